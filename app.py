@@ -1,16 +1,23 @@
 import streamlit as st
 import pandas as pd
-import requests
-import xml.etree.ElementTree as ET
-import urllib.parse
-import feedparser
 from datetime import datetime
-from dateutil.relativedelta import relativedelta
 import time
 import os
-from difflib import get_close_matches
-import re
-import altair as alt
+
+_rerun_started = time.perf_counter()
+
+import metrics
+from feed import CHANGE_LABELS, mark_new_deals, recent_watch_changes
+from fetcher import circuit_states, host_limits
+from frames import add_link_columns, get_interest_data, trend_frames
+from name_index import NameIndex
+from news import partition_by_publisher
+from regions import REGION_NAMES, REGIONS
+from snapshot import snapshot_cube, snapshot_months, snapshot_trade_frame
+from store import (AREA_LABELS, ARCHIVE_START, api_usage, changes_version, cube_version, history_months, last_syncs, load_cube,
+                   load_news, load_trade_frame, news_version, partition_coverage, store_version)
+from sync import ARCHIVE_MONTHS, HISTORY_MONTHS, load_keys, start_scheduler
+from watchlist import add_apt, load_watchlist, region_keys, remove_apt, watchlist_version
 
 # -----------------------------------------------------------------------------
 # 1. 화면 디자인 및 설정
@@ -38,274 +45,232 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-CSV_FILE = "my_apts.csv"
-
-# ★ 지역별 설정
-REGIONS = {
-    "춘천시": {
-        "code": "51110",
-        "dongs": sorted(["퇴계동", "온의동", "석사동", "후평동", "동면", "신북읍", "우두동", "효자동", "근화동", "소양로", "약사명동", "칠전동", "사농동"]),
-        "publishers": [
-            {"name": "전체", "domain_key": "ALL"},
-            {"name": "강원일보", "domain_key": "kwnews"},
-            {"name": "강원도민일보", "domain_key": "kado"},
-            {"name": "MS투데이", "domain_key": "mstoday"}
-        ]
-    },
-    "원주시": {
-        "code": "51130",
-        "dongs": sorted(["반곡동", "무실동", "단구동", "단계동", "관설동", "지정면", "문막읍", "태장동", "우산동", "명륜동", "개운동", "중앙동", "봉산동", "행구동"]),
-        "publishers": [
-            {"name": "전체", "domain_key": "ALL"},
-            {"name": "강원일보", "domain_key": "kwnews"},
-            {"name": "강원도민일보", "domain_key": "kado"},
-            {"name": "원주MBC", "domain_key": "wjmbc"}
-        ]
-    }
-}
-
 # -----------------------------------------------------------------------------
-# 2. 데이터 관리 함수
+# 2. 데이터 조회 (로컬 저장소)
 # -----------------------------------------------------------------------------
-def load_my_apts():
-    if not os.path.exists(CSV_FILE):
-        df = pd.DataFrame({
-            "지역": ["춘천시", "원주시"],
-            "동": ["퇴계동", "반곡동"], 
-            "아파트명": ["e편한세상춘천한숲시티", "원주혁신도시중흥S-클래스프라디움"]
-        })
-        df.to_csv(CSV_FILE, index=False, encoding='utf-8-sig')
-        return df
-    try: 
-        df = pd.read_csv(CSV_FILE)
-        if "지역" not in df.columns: df["지역"] = "춘천시"
-        return df
-    except: return pd.DataFrame(columns=["지역", "동", "아파트명"])
-
-def save_my_apts(df):
-    df.to_csv(CSV_FILE, index=False, encoding='utf-8-sig')
+@st.cache_resource(max_entries=32, show_spinner=False)
+def get_trade_frame(dataset, region_code, months, version):
+    # 동기화 1회당 (데이터셋, 지역) 별로 타입 프레임을 한 번만 만들어 모든 탭이 공유 (읽기 전용)
+    metrics.incr("cache_miss_total", cache="trade_frame")
+    df = snapshot_trade_frame(dataset, region_code, months)
+    return df if df is not None else load_trade_frame(dataset, region_code, months)
 
-# -----------------------------------------------------------------------------
-# 3. 데이터 수집 함수
-# -----------------------------------------------------------------------------
-def get_recent_months(months=6):
-    now = datetime.now()
-    return [(now - relativedelta(months=i)).strftime("%Y%m") for i in range(months)]
-
-@st.cache_data(ttl=60)
-def get_apt_data_api(api_key, region_code):
-    if not api_key: return []
-    months = get_recent_months(6)
-    all_data = []
-    base_url = "https://apis.data.go.kr/1613000/RTMSDataSvcAptTradeDev/getRTMSDataSvcAptTradeDev"
-    
-    for ym in months:
-        query_url = f"{base_url}?serviceKey={api_key}&LAWD_CD={region_code}&DEAL_YMD={ym}&numOfRows=1000&pageNo=1"
-        try:
-            response = requests.get(query_url, timeout=10, verify=False)
-            try:
-                root = ET.fromstring(response.content)
-                if root.findtext('.//resultCode') not in ['00', '000']: continue
-                for item in root.findall('.//item'):
-                    try:
-                        price = int(item.findtext('dealAmount').strip().replace(',', ''))
-                        # ★ 날짜 포맷 변경: YYYY.MM.DD
-                        date_str = f"{item.findtext('dealYear')}.{item.findtext('dealMonth').zfill(2)}.{item.findtext('dealDay').zfill(2)}"
-                        
-                        all_data.append({
-                            '계약일': date_str,
-                            '동': item.findtext('umdNm').strip(),
-                            '아파트명': item.findtext('aptNm').strip(),
-                            '면적': float(item.findtext('excluUseAr')),
-                            '국토부 실거래가': price,
-                        })
-                    except: continue
-            except: continue
-        except: continue
-    return all_data
-
-@st.cache_data(ttl=60)
-def get_land_data_api(api_key, region_code):
-    if not api_key: return []
-    months = get_recent_months(6)
-    all_data = []
-    base_url = "https://apis.data.go.kr/1613000/RTMSDataSvcLandTrade/getRTMSDataSvcLandTrade"
-    
-    for ym in months:
-        query_url = f"{base_url}?serviceKey={api_key}&LAWD_CD={region_code}&DEAL_YMD={ym}&numOfRows=1000&pageNo=1"
-        try:
-            response = requests.get(query_url, timeout=10, verify=False)
-            try:
-                root = ET.fromstring(response.content)
-                if root.findtext('.//resultCode') not in ['00', '000']: continue
-                for item in root.findall('.//item'):
-                    try:
-                        price = int(item.findtext('dealAmount').strip().replace(',', ''))
-                        # ★ 날짜 포맷 변경: YYYY.MM.DD
-                        date_str = f"{item.findtext('dealYear')}.{item.findtext('dealMonth').zfill(2)}.{item.findtext('dealDay').zfill(2)}"
-                        
-                        all_data.append({
-                            '계약일': date_str,
-                            '동': item.findtext('umdNm').strip(),
-                            '아파트명': item.findtext('jimok'), 
-                            '면적': float(item.findtext('dealArea')),
-                            '국토부 실거래가': price,
-                        })
-                    except: continue
-            except: continue
-        except: continue
-    return all_data
+# 조회 기간 (개월, 0 = 전체). 동기화 보관 기간(ARCHIVE_MONTHS)을 넘지 않는 것만 고를 수 있다.
+WINDOW_OPTIONS = [m for m in (6, 12, 36, 60, 120) if m < ARCHIVE_MONTHS] + [ARCHIVE_MONTHS] if ARCHIVE_MONTHS else [6, 12, 36, 60, 120, 0]
+
+def window_label(months):
+    if not months: return f"전체 ({ARCHIVE_START[:4]}.{ARCHIVE_START[4:]}~)"
+    return f"최근 {months // 12}년" if months % 12 == 0 else f"최근 {months}개월"
+
+def selected_months():
+    return tuple(history_months(st.session_state.get("history_window", HISTORY_MONTHS)))
+
+def cached_trade_frame(dataset, region_code):
+    metrics.incr("cache_lookup_total", cache="trade_frame")
+    return get_trade_frame(dataset, region_code, selected_months(), store_version())
+
+# 화면은 로컬 저장소만 읽는다. 수집은 sync.py (백그라운드 스레드 또는 python -m sync) 담당.
+@metrics.timed()
+def get_apt_data_api(region_code):
+    return cached_trade_frame("apt", region_code)
+
+@metrics.timed()
+def get_land_data_api(region_code):
+    return cached_trade_frame("land", region_code)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def get_interest_frame(region_name, region_code, months, version, watch_version):
+    # 관심 매물 join 은 저장소나 관심 목록이 바뀔 때만 다시 계산
+    metrics.incr("cache_miss_total", cache="interest")
+    metrics.incr("cache_lookup_total", cache="trade_frame")
+    return get_interest_data(get_trade_frame("apt", region_code, months, version), region_name)
+
+FEED_REFRESH = "60s"   # 관심 매물 탭이 새 거래를 다시 확인하는 주기 (페이지 새로고침 없이)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def get_watch_changes(region_name, version, hour):
+    # 관심 단지의 최근 변경 (변경 피드 / 관심 목록이 바뀌거나 한 시간이 지나면 다시 읽음)
+    metrics.incr("cache_miss_total", cache="watch_changes")
+    return recent_watch_changes(region_name)
+
+def server_keys():
+    # 동기화 키는 서버 설정(환경변수 / st.secrets)에서만 읽는다.
+    # 스케줄러는 프로세스 전체가 함께 쓰므로 방문자가 입력한 키(오타, 만료, 남의 쿼터)로 바꾸지 않는다.
+    try: secrets = dict(st.secrets)
+    except FileNotFoundError: secrets = {}   # secrets.toml 없이 환경변수만 쓰는 배포
+    return {name: value or secrets.get(name, "") for name, value in load_keys().items()}
+
+def ensure_background_sync(keys):
+    # 프로세스에 스케줄러 스레드 1개
+    return start_scheduler(keys)
+
+def format_freshness(kind, label):
+    run = last_syncs().get(kind)
+    if not run: return f"{label}: 아직 동기화 전"
+    ts, ok, detail = run
+    mins = int((time.time() - ts) // 60)
+    ago = "방금 전" if mins < 1 else f"{mins}분 전" if mins < 60 else f"{mins // 60}시간 전"
+    state = "" if ok else f" ⚠️ 일부 실패 ({detail})"
+    return f"{label}: {datetime.fromtimestamp(ts).strftime('%Y.%m.%d %H:%M')} ({ago}){state}"
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def get_cube(region_codes, months, level, band, dong, version):
+    # 지역 비교 화면은 원본 거래 대신 미리 계산된 월별 집계만 읽는다
+    metrics.incr("cache_miss_total", cache="cube")
+    df = snapshot_cube(region_codes, months, level, band, dong)
+    return df if df is not None else load_cube(region_codes, months, level, band, dong)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def get_coverage(dataset, region_code, months, version):
+    metrics.incr("cache_miss_total", cache="coverage")
+    cov = partition_coverage(dataset, region_code, months)
+    # 로컬 DB 에 없어도 스냅샷에서 읽는 달은 받은 달로 본다 (백필 중인 새 컨테이너)
+    have = snapshot_months(dataset, region_code)
+    return {**cov, 'missing': [ym for ym in cov['missing'] if ym not in have]}
+
+def show_coverage(dataset, region_code):
+    # 동기화가 한 번이라도 끝난 뒤, 받지 못했거나 갱신에 실패한 달이 있으면 알린다
+    run = last_syncs().get("trades")
+    if not run: return
+    metrics.incr("cache_lookup_total", cache="coverage")
+    cov = get_coverage(dataset, region_code, selected_months(), (store_version(), run[0]))
+    if cov['missing']: st.warning(f"⚠️ 아직 받지 못한 달: {format_month_ranges(cov['missing'])} — 아래 내역은 일부 기간만 포함합니다.")
+    if cov['stale']: st.caption(f"⏳ 갱신 실패/지연으로 이전에 받은 데이터를 보여주는 달: {format_month_ranges(cov['stale'])}")
+
+def format_month_ranges(yms):
+    # 연속된 달은 묶어서: 2006.01~2015.12 (120개월), 2024.03
+    ordered = sorted(yms)
+    idx = [int(ym[:4]) * 12 + int(ym[4:]) for ym in ordered]
+    runs, start = [], 0
+    for i in range(1, len(ordered) + 1):
+        if i == len(ordered) or idx[i] != idx[i - 1] + 1:
+            a, b = ordered[start], ordered[i - 1]
+            runs.append(f"{a[:4]}.{a[4:]}" if a == b else f"{a[:4]}.{a[4:]}~{b[:4]}.{b[4:]} ({i - start}개월)")
+            start = i
+    return ", ".join(runs)
 
 # -----------------------------------------------------------------------------
-# 4. 유틸리티 & 그래프
+# 3. 유틸리티 & 그래프
 # -----------------------------------------------------------------------------
-def get_links(region_name, dong, name, is_land=False):
-    city = region_name[:2]
-    q = f"{city} {dong} {name}"
-    enc = urllib.parse.quote(q)
-    if is_land: return {"kb": f"https://map.naver.com/p/search/{enc}", "naver": f"https://new.land.naver.com/search?sk={enc}"}
-    return {"kb": f"https://kbland.kr/search?q={enc}", "naver": f"https://new.land.naver.com/search?sk={enc}"}
-
-def get_interest_data(api_list, my_df, current_region):
-    if not api_list: return pd.DataFrame()
-    df_api = pd.DataFrame(api_list)
-    region_df = my_df[my_df['지역'] == current_region]
-    my_interests = set(zip(region_df['동'], region_df['아파트명']))
-    df_interest = df_api[df_api.apply(lambda x: (x['동'], x['아파트명']) in my_interests, axis=1)].copy()
-    
-    found_interests = set(zip(df_interest['동'], df_interest['아파트명'])) if not df_interest.empty else set()
-    dummy_rows = []
-    for _, row in region_df.iterrows():
-        if (row['동'], row['아파트명']) not in found_interests:
-            dummy_rows.append({
-                '계약일': '-', '동': row['동'], '아파트명': row['아파트명'], 
-                '면적': None, '국토부 실거래가': None 
-            })
-    df_final = pd.concat([df_interest, pd.DataFrame(dummy_rows)], ignore_index=True)
-    if df_final.empty: return pd.DataFrame()
-    
-    # 정렬용 날짜 포맷도 점(.)으로 변경
-    df_final['sort_date'] = df_final['계약일'].apply(lambda x: '9999.99.99' if x == '-' else x)
-    return df_final.sort_values(by=['sort_date', '동'], ascending=[False, True]).drop(columns=['sort_date'])
+@st.cache_resource(max_entries=256, show_spinner=False)
+def get_name_index(region_code, dong, months, version, _df_api):
+    # (지역, 동, 조회 기간) 별 이름 인덱스. 저장소 버전이 바뀔 때만 다시 만든다.
+    # _df_api 는 해시하지 않으므로 프레임을 정하는 조회 기간을 키에 꼭 넣는다.
+    metrics.incr("cache_miss_total", cache="name_index")
+    return NameIndex(_df_api.loc[_df_api['동'] == dong, '아파트명'].unique())
 
-def get_inferred_apt_name(api_data, input_name, input_dong):
-    if not api_data or not input_name: return input_name
-    dong_apts = list(set([d['아파트명'] for d in api_data if d['동'] == input_dong]))
-    matches = get_close_matches(input_name, dong_apts, n=1, cutoff=0.2)
-    return matches[0] if matches else input_name
+def get_inferred_apt_name(df_api, input_name, input_dong, region_code):
+    if df_api.empty or not input_name: return input_name
+    metrics.incr("cache_lookup_total", cache="name_index")
+    matches = get_name_index(region_code, input_dong, selected_months(), store_version(), df_api).search(input_name, n=1)
+    return matches[0][0] if matches else input_name
 
+@metrics.timed()
 def plot_apt_trend(df_apt):
     if df_apt.empty:
         st.info("데이터가 부족하여 그래프를 그릴 수 없습니다.")
         return
 
-    df_apt = df_apt.copy()
-    # 날짜 파싱 (점 구분자 처리)
-    df_apt['계약일'] = pd.to_datetime(df_apt['계약일'], format='%Y.%m.%d', errors='coerce')
-    
-    base = alt.Chart(df_apt).encode(
-        x=alt.X('계약일:T', title='계약일', axis=alt.Axis(format='%Y.%m.%d')), # 축 포맷도 변경
+    import altair as alt   # 그래프를 그릴 때만 불러온다 (첫 화면 기동 시간 절약)
+
+    # 서버에서 면적 타입별 이동 중위값을 구하고 점 수를 예산 이하로 줄여서 보낸다
+    points, medians = trend_frames(df_apt)
+    x = alt.X('계약일:T', title='계약일', axis=alt.Axis(format='%Y.%m.%d')) # 축 포맷도 변경
+    color = alt.Color('면적타입:N', title='면적')
+
+    dots = alt.Chart(points).mark_circle(size=40, opacity=0.45).encode(
+        x=x,
         y=alt.Y('국토부 실거래가:Q', title='거래금액(만원)', scale=alt.Scale(zero=False)),
+        color=color,
         tooltip=[alt.Tooltip('계약일', format='%Y.%m.%d'), '국토부 실거래가', '면적']
     )
-    
-    line = base.mark_line(color='#FF4B4B')
-    points = base.mark_circle(size=60, color='#FF4B4B')
-    
-    chart = (line + points).properties(height=300).interactive()
+    line = alt.Chart(medians).mark_line(strokeWidth=2.5).encode(
+        x=x, y='이동 중위가:Q', color=color,
+        tooltip=[alt.Tooltip('계약일', format='%Y.%m.%d'), alt.Tooltip('이동 중위가:Q', format=',.0f'), '면적타입']
+    )
+
+    chart = (dots + line).properties(height=300).interactive()
     st.altair_chart(chart, use_container_width=True)
+    if len(points) < len(df_apt):
+        st.caption(f"전체 {len(df_apt):,}건 중 {len(points):,}개 점 표시 (LTTB) · 선: 면적별 90일 이동 중위가")
 
 # -----------------------------------------------------------------------------
-# 5. 네이버 뉴스 수집
+# 4. 네이버 뉴스
 # -----------------------------------------------------------------------------
-def clean_html(text):
-    return re.sub('<.+?>', '', text).replace('&quot;', '"').replace('&apos;', "'").replace('&amp;', '&')
-
-def get_naver_news_list(client_id, client_secret, region_name, category, publisher_name, domain_key):
-    if not client_id or not client_secret: return []
-    city = region_name[:2]
-    search_keyword = f"{city} 부동산" if category == "부동산" else city
-    if publisher_name != "전체": search_keyword += f" {publisher_name}"
-        
-    url = "https://openapi.naver.com/v1/search/news.json"
-    headers = {"X-Naver-Client-Id": client_id, "X-Naver-Client-Secret": client_secret}
-    params = {"query": search_keyword, "display": 100 if publisher_name != "전체" else 20, "start": 1, "sort": "date"}
-    
-    try:
-        res = requests.get(url, headers=headers, params=params, timeout=5)
-        if res.status_code == 200:
-            items = res.json().get('items', [])
-            news = []
-            today = datetime.now().strftime("%Y-%m-%d") # 비교용 오늘 날짜
-            for item in items:
-                link = item['link']
-                originallink = item.get('originallink', '')
-                if domain_key != "ALL":
-                    if (domain_key not in link) and (domain_key not in originallink): continue
-                try:
-                    # 뉴스 날짜 포맷 변경: YYYY.MM.DD
-                    pub_date = datetime.strptime(item['pubDate'], "%a, %d %b %Y %H:%M:%S +0900")
-                    date_str = pub_date.strftime("%Y.%m.%d")
-                    # 오늘 날짜 비교를 위해 YYYY-MM-DD 포맷도 잠시 사용
-                    compare_date = pub_date.strftime("%Y-%m-%d")
-                except: 
-                    date_str = item['pubDate']
-                    compare_date = date_str
-                
-                news.append({
-                    'title': clean_html(item['title']),
-                    'link': originallink if originallink else link,
-                    'date_str': date_str,
-                    'is_today': compare_date == today,
-                    'source': publisher_name
-                })
-            return news[:20]
-        return []
-    except: return []
+@st.cache_data(show_spinner=False)
+def get_news_buckets(region_name, category, version):
+    # 저장된 (지역, 분류) 검색 결과 → 언론사별 분류. 모든 세션이 캐시를 공유한다.
+    metrics.incr("cache_miss_total", cache="news_buckets")
+    return partition_by_publisher(load_news(region_name, category), REGIONS[region_name]["publishers"])
+
+@metrics.timed()
+def get_naver_news_list(region_name, category, publisher_name):
+    metrics.incr("cache_lookup_total", cache="news_buckets")
+    buckets = get_news_buckets(region_name, category, news_version())
+    today = datetime.now().strftime("%Y-%m-%d") # 비교용 오늘 날짜
+    return [dict(n, is_today=n['compare_date'] == today) for n in buckets.get(publisher_name, [])]
 
 # -----------------------------------------------------------------------------
-# 6. 메인 UI
+# 5. 메인 UI
 # -----------------------------------------------------------------------------
 st.title("🏔️ 강원도 부동산 통합 관제 시스템")
 
 with st.sidebar:
     st.header("🔑 API 설정")
-    if "public_api_key" in st.secrets:
-        api_key_val = st.secrets["public_api_key"]
-        st.success("✅ 공공데이터 키 자동 연결됨")
-    else:
-        api_key_val = st.text_input("공공데이터 인증키(Decoding)", type="password")
+    sync_keys = server_keys()
+    api_key_val = sync_keys["public_api_key"]
+    naver_id, naver_secret = sync_keys["naver_client_id"], sync_keys["naver_client_secret"]
+    if api_key_val: st.success("✅ 공공데이터 키 자동 연결됨")
+    else: st.warning("공공데이터 키가 설정되지 않았습니다.")
     
     st.divider()
     
-    if "naver_client_id" in st.secrets and "naver_client_secret" in st.secrets:
-        naver_id = st.secrets["naver_client_id"]
-        naver_secret = st.secrets["naver_client_secret"]
-        st.success("✅ 네이버 검색 키 자동 연결됨")
-    else:
-        st.caption("뉴스 검색용 네이버 키")
-        naver_id = st.text_input("Naver Client ID", type="password")
-        naver_secret = st.text_input("Naver Client Secret", type="password")
+    if naver_id and naver_secret: st.success("✅ 네이버 검색 키 자동 연결됨")
+    else: st.warning("네이버 검색 키가 설정되지 않았습니다.")
+    if not (api_key_val and naver_id and naver_secret):
+        st.caption("키는 서버 설정에서만 읽습니다: .streamlit/secrets.toml 또는 환경변수 PUBLIC_API_KEY / NAVER_CLIENT_ID / NAVER_CLIENT_SECRET")
     
     st.divider()
 
-region_tabs = st.tabs(["춘천시", "원주시"])
+    if os.environ.get("REALESTATE_BACKGROUND_SYNC", "1") != "0" and (api_key_val or (naver_id and naver_secret)):
+        ensure_background_sync(sync_keys)
+    st.caption("🔄 " + format_freshness("trades", "실거래"))
+    st.caption("🔄 " + format_freshness("news", "뉴스"))
+
+    st.divider()
+
+    lazy_render = st.toggle("보이는 화면만 계산 (지연 렌더링)", value=True, key="lazy_render",
+                            help="끄면 모든 지역/탭을 한 번에 그립니다.")
+    show_diagnostics = st.toggle("🩺 진단 정보 보기", value=False, key="show_diagnostics")
+    st.selectbox("📅 조회 기간", WINDOW_OPTIONS, index=WINDOW_OPTIONS.index(HISTORY_MONTHS) if HISTORY_MONTHS in WINDOW_OPTIONS else 0,
+                 format_func=window_label, key="history_window")
+
+    st.divider()
+
+def render_sections(sections, key):
+    # sections: [(제목, 그리기 함수)]
+    # 지연 렌더링: 선택된 섹션 하나만 실행 / 아니면 모든 섹션을 st.tabs 로 실행
+    titles = [t for t, _ in sections]
+    if lazy_render:
+        choice = st.radio(key, titles, horizontal=True, key=key, label_visibility="collapsed")
+        dict(sections)[choice]()
+    else:
+        for tab, (_, draw) in zip(st.tabs(titles), sections):
+            with tab: draw()
 
 common_config = {
+    "계약일": st.column_config.DateColumn(format="YYYY.MM.DD"),
     "kb_link": st.column_config.LinkColumn("KB", display_text="확인하기"),
     "naver_link": st.column_config.LinkColumn("네이버", display_text="확인하기"),
     "면적": st.column_config.NumberColumn(format="%.2f m²"),
     "국토부 실거래가": st.column_config.NumberColumn(label="국토부 실거래가 (만원)", format="%,d"),
+    "새 거래": st.column_config.TextColumn("", width="small"),
 }
 
 def render_region_dashboard(region_name):
     r_code = REGIONS[region_name]["code"]
-    r_dongs = REGIONS[region_name]["dongs"]
+    r_dongs = REGIONS[region_name]["dongs"] or sorted(get_apt_data_api(r_code)['동'].unique())
     r_pubs = REGIONS[region_name]["publishers"]
-    
-    raw_data = []
-    if api_key_val:
-        raw_data = get_apt_data_api(api_key_val, r_code)
 
     # --- 사이드바 (관심 관리) ---
     with st.sidebar:
@@ -316,33 +281,29 @@ def render_region_dashboard(region_name):
                 input_name = c2.text_input("아파트명")
                 if st.form_submit_button("추가"):
                     if input_name:
-                        full_name = get_inferred_apt_name(raw_data, input_name, input_dong)
+                        full_name = get_inferred_apt_name(get_apt_data_api(r_code), input_name, input_dong, r_code)
                         if full_name != input_name: st.toast(f"💡 '{full_name}' 보정됨")
-                        curr_df = load_my_apts()
-                        cond = (curr_df['지역'] == region_name) & (curr_df['동'] == input_dong) & (curr_df['아파트명'] == full_name)
-                        if not cond.any():
-                            new_entry = pd.DataFrame({"지역": [region_name], "동": [input_dong], "아파트명": [full_name]})
-                            save_my_apts(pd.concat([curr_df, new_entry], ignore_index=True))
+                        if add_apt(region_name, input_dong, full_name):
                             st.rerun()
 
             st.caption(f"📋 {region_name} 관리 목록")
-            my_df = load_my_apts()
+            my_df = load_watchlist()
             region_my_df = my_df[my_df['지역'] == region_name]
-            for idx, row in region_my_df.iterrows():
+            for watch_id, dong, name in zip(region_my_df.index, region_my_df['동'], region_my_df['아파트명']):
                 rc1, rc2 = st.columns([0.8, 0.2])
-                rc1.text(f"[{row['동']}] {row['아파트명']}")
-                if rc2.button("삭제", key=f"del_{region_name}_{idx}"):
-                    save_my_apts(my_df.drop(idx))
+                rc1.text(f"[{dong}] {name}")
+                if rc2.button("삭제", key=f"del_{region_name}_{watch_id}"):
+                    remove_apt(watch_id)
                     st.rerun()
 
     st.markdown(f"### 🔍 {region_name} 실거래 현황")
-    
-    t1, t2, t3 = st.tabs(["🏢 아파트", "⛰️ 토지", "📰 지역 뉴스"])
 
     # 1. 아파트 탭
-    with t1:
-        if api_key_val and raw_data:
-            df_all = pd.DataFrame(raw_data).sort_values(by="계약일", ascending=False)
+    def apt_panel():
+        raw_data = get_apt_data_api(r_code)
+        show_coverage("apt", r_code)
+        if not raw_data.empty:
+            df_all = raw_data   # 캐시에 공유된 프레임 — 읽기만 하고, 컬럼을 붙이는 all_list 에서만 복사
             
             st.markdown("#### 📉 아파트 시세 집중 분석")
             col_sel1, col_sel2 = st.columns(2)
@@ -373,75 +334,169 @@ def render_region_dashboard(region_name):
             
             st.divider()
 
-            sub_t1, sub_t2 = st.tabs(["♥ 관심 매물 모아보기", "📋 전체 실거래 내역"])
-            
-            with sub_t1:
-                df_interest = get_interest_data(raw_data, my_df, region_name)
+            @st.fragment(run_every=FEED_REFRESH)
+            def interest_list():
+                metrics.incr("cache_lookup_total", cache="interest")
+                df_interest = get_interest_frame(region_name, r_code, selected_months(), store_version(), watchlist_version())
+                metrics.incr("cache_lookup_total", cache="watch_changes")
+                changes = get_watch_changes(region_name, (changes_version(), watchlist_version()), int(time.time() // 3600))
+                if not changes.empty:
+                    n_new = int((changes['변경'] == CHANGE_LABELS["new"]).sum())
+                    cancelled = changes[changes['변경'] == CHANGE_LABELS["cancelled"]]
+                    st.markdown(f'<span class="badge-today">새 거래 {n_new}건</span> 최근 24시간 관심 단지 변동' + (f' · 취소 {len(cancelled)}건' if len(cancelled) else ''), unsafe_allow_html=True)
+                    for _, d in cancelled.iterrows():
+                        st.caption(f"❌ 취소: [{d['동']}] {d['아파트명']} {d['계약일']:%Y.%m.%d} {d['면적']:.2f}m² {d['국토부 실거래가']:,}만원")
                 if not df_interest.empty:
-                    df_interest['kb_link'] = df_interest.apply(lambda x: get_links(region_name, x['동'], x['아파트명'])['kb'] if x['아파트명'] != '-' else '-', axis=1)
-                    df_interest['naver_link'] = df_interest.apply(lambda x: get_links(region_name, x['동'], x['아파트명'])['naver'] if x['아파트명'] != '-' else '-', axis=1)
-                    st.dataframe(df_interest, column_config=common_config, column_order=["계약일", "동", "아파트명", "면적", "국토부 실거래가", "kb_link", "naver_link"], hide_index=True, use_container_width=True)
+                    df_interest = mark_new_deals(df_interest, changes)
+                    add_link_columns(df_interest, region_name)
+                    st.dataframe(df_interest, column_config=common_config, column_order=["새 거래", "계약일", "동", "아파트명", "면적", "국토부 실거래가", "kb_link", "naver_link"], hide_index=True, use_container_width=True)
                 else: st.info("관심 매물 거래가 없습니다.")
             
-            with sub_t2:
-                df_all['kb_link'] = df_all.apply(lambda x: get_links(region_name, x['동'], x['아파트명'])['kb'], axis=1)
-                df_all['naver_link'] = df_all.apply(lambda x: get_links(region_name, x['동'], x['아파트명'])['naver'], axis=1)
-                st.dataframe(df_all, column_config=common_config, column_order=["계약일", "동", "아파트명", "면적", "국토부 실거래가", "kb_link", "naver_link"], hide_index=True, use_container_width=True)
+            def all_list():
+                df_list = df_all.copy()
+                add_link_columns(df_list, region_name)
+                st.dataframe(df_list, column_config=common_config, column_order=["계약일", "동", "아파트명", "면적", "국토부 실거래가", "kb_link", "naver_link"], hide_index=True, use_container_width=True)
+
+            render_sections([("♥ 관심 매물 모아보기", interest_list), ("📋 전체 실거래 내역", all_list)], f"apt_view_{region_name}")
         
         elif not api_key_val:
             st.warning("API 키가 필요합니다.")
         else:
-            st.info("데이터를 불러오는 중이거나 데이터가 없습니다.")
+            st.info("데이터를 준비 중이거나 데이터가 없습니다. (백그라운드 동기화)")
 
     # 2. 토지 탭
-    with t2:
-        if api_key_val:
-            l_raw = get_land_data_api(api_key_val, r_code)
-            sub_l1, sub_l2 = st.tabs(["♥ 관심 동네", "📋 전체 실거래"])
+    def land_panel():
+        l_raw = get_land_data_api(r_code)
+        show_coverage("land", r_code)
+        if api_key_val or not l_raw.empty:
+            l_ok = not l_raw.empty
             land_config = common_config.copy()
             land_config["아파트명"] = st.column_config.TextColumn("지목")
 
-            with sub_l1:
-                interest_dongs = my_df[my_df['지역'] == region_name]['동'].unique()
-                if l_raw:
-                    df_l = pd.DataFrame(l_raw)
-                    df_l_int = df_l[df_l['동'].isin(interest_dongs)].sort_values(by="계약일", ascending=False)
+            def interest_land():
+                interest_dongs = region_keys(region_name).get_level_values('동').unique()
+                if l_ok:
+                    df_l_int = l_raw[l_raw['동'].isin(interest_dongs)].copy()
                     if not df_l_int.empty:
-                        df_l_int['kb_link'] = df_l_int.apply(lambda x: get_links(region_name, x['동'], x['아파트명'], True)['kb'], axis=1)
-                        df_l_int['naver_link'] = df_l_int.apply(lambda x: get_links(region_name, x['동'], x['아파트명'], True)['naver'], axis=1)
+                        add_link_columns(df_l_int, region_name, True)
                         st.dataframe(df_l_int, column_config=land_config, column_order=["계약일", "동", "아파트명", "면적", "국토부 실거래가", "kb_link", "naver_link"], hide_index=True, use_container_width=True)
                     else: st.info(f"관심 동네({', '.join(interest_dongs)})의 토지 거래가 없습니다.")
                 else: st.info("데이터가 없습니다.")
-            with sub_l2:
-                if l_raw:
-                    df_l_all = pd.DataFrame(l_raw).sort_values(by="계약일", ascending=False)
-                    df_l_all['kb_link'] = df_l_all.apply(lambda x: get_links(region_name, x['동'], x['아파트명'], True)['kb'], axis=1)
-                    df_l_all['naver_link'] = df_l_all.apply(lambda x: get_links(region_name, x['동'], x['아파트명'], True)['naver'], axis=1)
+            def all_land():
+                if l_ok:
+                    df_l_all = l_raw.copy()
+                    add_link_columns(df_l_all, region_name, True)
                     st.dataframe(df_l_all, column_config=land_config, column_order=["계약일", "동", "아파트명", "면적", "국토부 실거래가", "kb_link", "naver_link"], hide_index=True, use_container_width=True)
                 else: st.info("데이터가 없습니다.")
+
+            render_sections([("♥ 관심 동네", interest_land), ("📋 전체 실거래", all_land)], f"land_view_{region_name}")
         else: st.warning("API 키가 필요합니다.")
 
     # 3. 뉴스 탭
-    with t3:
+    def news_panel():
         st.subheader(f"📰 {region_name} 주요 소식")
         
-        if not naver_id or not naver_secret:
-            st.warning("왼쪽 사이드바에 '네이버 API Key'를 입력해야 뉴스가 보입니다.")
+        if (not naver_id or not naver_secret) and not news_version():
+            st.warning("서버 설정에 네이버 API 키가 있어야 뉴스가 보입니다.")
         else:
-            nt1, nt2 = st.tabs(["🏠 부동산", "📑 일반/통합"])
             def create_news_tabs(cat_name):
-                tabs = st.tabs([p['name'] for p in r_pubs])
-                for i, tab in enumerate(tabs):
-                    with tab:
-                        pub_info = r_pubs[i]
-                        items = get_naver_news_list(naver_id, naver_secret, region_name, cat_name, pub_info['name'], pub_info['domain_key'])
-                        if items:
-                            for n in items:
-                                b = '<span class="badge-today">오늘</span>' if n['is_today'] else ''
-                                st.markdown(f'<div class="news-box"><a href="{n["link"]}" target="_blank" class="news-title">{b}{n["title"]}</a><div class="news-meta">{n["source"]} | {n["date_str"]}</div></div>', unsafe_allow_html=True)
-                        else: st.info(f"'{pub_info['name']}' 관련 최신 기사가 없습니다.")
-            with nt1: create_news_tabs("부동산")
-            with nt2: create_news_tabs("전체")
-
-with region_tabs[0]: render_region_dashboard("춘천시")
-with region_tabs[1]: render_region_dashboard("원주시")
\ No newline at end of file
+                def draw_publisher(pub_info):
+                    items = get_naver_news_list(region_name, cat_name, pub_info['name'])
+                    if items:
+                        for n in items:
+                            b = '<span class="badge-today">오늘</span>' if n['is_today'] else ''
+                            st.markdown(f'<div class="news-box"><a href="{n["link"]}" target="_blank" class="news-title">{b}{n["title"]}</a><div class="news-meta">{n["source"]} | {n["date_str"]}</div></div>', unsafe_allow_html=True)
+                    else: st.info(f"'{pub_info['name']}' 관련 최신 기사가 없습니다.")
+                render_sections([(p['name'], lambda p=p: draw_publisher(p)) for p in r_pubs], f"news_pub_{region_name}_{cat_name}")
+            render_sections([("🏠 부동산", lambda: create_news_tabs("부동산")), ("📑 일반/통합", lambda: create_news_tabs("전체"))], f"news_cat_{region_name}")
+
+    render_sections([("🏢 아파트", apt_panel), ("⛰️ 토지", land_panel), ("📰 지역 뉴스", news_panel)], f"dataset_{region_name}")
+
+CUBE_METRICS = {"거래건수": "거래 수 (건)", "중위가격": "중위 가격 (만원)", "㎡당 중위가격": "㎡당 중위 가격 (만원)", "평당 중위가격": "평당 중위 가격 (만원)"}
+
+def render_comparison():
+    st.markdown("### 📊 지역 비교 (아파트 월별 집계)")
+    c1, c2, c3 = st.columns([0.5, 0.2, 0.3])
+    names = c1.multiselect("지역", list(REGIONS), default=list(REGIONS), key="cmp_regions")
+    band = c2.selectbox("면적대 (전용)", ["전체", *AREA_LABELS], key="cmp_band")
+    months = c3.select_slider("기간", options=WINDOW_OPTIONS, value=12 if 12 in WINDOW_OPTIONS else WINDOW_OPTIONS[-1],
+                              format_func=window_label, key="cmp_months")
+    metric = st.radio("지표", list(CUBE_METRICS), format_func=CUBE_METRICS.get, horizontal=True, key="cmp_metric")
+    if not names: return
+
+    band_key = "" if band == "전체" else band
+    window = tuple(history_months(months))
+    version = cube_version()
+    codes = tuple(REGIONS[n]["code"] for n in names)
+    metrics.incr("cache_lookup_total", cache="cube")
+    cube = get_cube(codes, window, "region", band_key, None, version)
+    if cube.empty:
+        st.info("집계 데이터가 없습니다. (백그라운드 동기화 후 표시)")
+        return
+    cube['지역'] = cube['지역코드'].map(REGION_NAMES)
+
+    import altair as alt
+    chart = alt.Chart(cube).mark_line(point=True).encode(
+        x=alt.X('년월:T', title='계약월', axis=alt.Axis(format='%Y.%m')),
+        y=alt.Y(f'{metric}:Q', title=CUBE_METRICS[metric], scale=alt.Scale(zero=metric == "거래건수")),
+        color=alt.Color('지역:N', sort=names),
+        tooltip=['지역', alt.Tooltip('년월:T', format='%Y.%m'), '거래건수', alt.Tooltip(f'{metric}:Q', format=',.0f')],
+    ).properties(height=360).interactive()
+    st.altair_chart(chart, use_container_width=True)
+
+    def pivot(df, index):
+        table = df.pivot_table(index=index, columns='년월', values=metric, aggfunc='first').round().astype('Int64')
+        table.columns = table.columns.strftime('%Y.%m')
+        return table
+
+    st.dataframe(pivot(cube, '지역').reindex([n for n in names if n in set(cube['지역'])]), use_container_width=True,
+                 column_config={c: st.column_config.NumberColumn(format="%,d") for c in cube['년월'].dt.strftime('%Y.%m').unique()})
+
+    with st.expander("🏘️ 동별 비교"):
+        drill = st.selectbox("지역 선택", names, key="cmp_drill")
+        metrics.incr("cache_lookup_total", cache="cube")
+        dongs = get_cube((REGIONS[drill]["code"],), window, "dong", band_key, None, version)
+        if dongs.empty: st.info("집계 데이터가 없습니다.")
+        else:
+            st.dataframe(pivot(dongs, '동'), use_container_width=True,
+                         column_config={c: st.column_config.NumberColumn(format="%,d") for c in dongs['년월'].dt.strftime('%Y.%m').unique()})
+
+render_sections([(name, lambda name=name: render_region_dashboard(name)) for name in REGIONS] + [("📊 지역 비교", render_comparison)], "region")
+
+# -----------------------------------------------------------------------------
+# 6. 진단 (rerun 시간, 구간별 p50/p95, 카운터)
+# -----------------------------------------------------------------------------
+rerun_sec = time.perf_counter() - _rerun_started
+metrics.observe("rerun", rerun_sec)
+metrics.log_event("rerun", ms=round(rerun_sec * 1000, 3), region=st.session_state.get("region"))
+metrics.write_prometheus()
+
+if show_diagnostics:
+    with st.sidebar.expander("🩺 진단 (프로세스 전체)", expanded=True):
+        snap = metrics.snapshot()
+        rerun = next((s for s in snap["spans"] if s["span"] == "rerun"), None)
+        if rerun:
+            d1, d2, d3 = st.columns(3)
+            d1.metric("rerun p50", f"{rerun['p50_ms']:.0f} ms")
+            d2.metric("rerun p95", f"{rerun['p95_ms']:.0f} ms")
+            d3.metric("이번 rerun", f"{rerun['last_ms']:.0f} ms")
+        spans = pd.DataFrame(snap["spans"])
+        if not spans.empty:
+            spans["labels"] = spans["labels"].map(lambda l: ", ".join(f"{k}={v}" for k, v in l.items()))
+            st.dataframe(spans, hide_index=True, use_container_width=True,
+                         column_config={c: st.column_config.NumberColumn(format="%.1f") for c in ["p50_ms", "p95_ms", "last_ms"]})
+        counters = pd.DataFrame(snap["counters"])
+        if not counters.empty:
+            counters["labels"] = counters["labels"].map(lambda l: ", ".join(f"{k}={v}" for k, v in l.items()))
+            st.dataframe(counters, hide_index=True, use_container_width=True)
+        breakers = circuit_states()
+        if breakers:
+            st.caption("회로 차단기 / 호스트 동시 요청 한도")
+            st.dataframe(pd.DataFrame([(n, s, f) for n, (s, f) in breakers.items()], columns=["endpoint", "state", "failures"]),
+                         hide_index=True, use_container_width=True)
+            st.dataframe(pd.DataFrame([(h, c, m) for h, (c, m) in host_limits().items()], columns=["host", "limit", "max"]),
+                         hide_index=True, use_container_width=True)
+        usage = api_usage()
+        if usage:
+            st.caption("오늘 API 호출 예산")
+            st.dataframe(pd.DataFrame(usage, columns=["key", "endpoint", "calls", "daily_limit"]), hide_index=True, use_container_width=True)
@@ -0,0 +1,48 @@
+"""두 벤치마크 리포트 비교.
+
+    python -m bench.compare base.json new.json --threshold 0.2
+
+(phase, size) 별 median 변화율을 출력하고, threshold 를 넘게 느려진 항목이 있으면 1 로 종료한다.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def load(path):
+    report = json.loads(Path(path).read_text(encoding="utf-8"))
+    return report["meta"], {(r["phase"], r["size"]): r for r in report["results"]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.compare")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.2, help="허용 median 증가율 (기본 20%%)")
+    parser.add_argument("--metric", default="median_ms", choices=["median_ms", "p95_ms", "min_ms"])
+    args = parser.parse_args(argv)
+
+    base_meta, base = load(args.base)
+    new_meta, new = load(args.new)
+    print(f"base {str(base_meta.get('commit'))[:10]}  →  new {str(new_meta.get('commit'))[:10]}   ({args.metric})")
+    regressions = []
+    for key in sorted(set(base) | set(new)):
+        b, n = base.get(key), new.get(key)
+        if not b or not n:
+            print(f"  {key[0]:<14} {key[1]:>6}   {'-' if not b else b[args.metric]:>10}  {'-' if not n else n[args.metric]:>10}")
+            continue
+        bv, nv = b[args.metric], n[args.metric]
+        change = (nv - bv) / bv if bv else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  ▲ REGRESSION"
+            regressions.append(key)
+        elif change < -args.threshold:
+            flag = "  ▼ faster"
+        print(f"  {key[0]:<14} {key[1]:>6}   {bv:>10.1f}  {nv:>10.1f}  {change:+7.1%}{flag}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
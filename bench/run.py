@@ -0,0 +1,186 @@
+"""오프라인 성능 벤치마크.
+
+    python -m bench.run --sizes 1k,10k --repeat 5 --out bench_report.json
+    python -m bench.compare base.json bench_report.json
+
+로컬 스텁 서버(bench.stub_server)와 임시 DB 를 띄운 뒤 단계별 시간을 잰다.
+    fetch          스텁에서 (apt × 조회 기간) 전체 페이지 수집 (+파싱)
+    parse          미리 만든 XML 페이지 파싱만
+    store_write    컬럼 버퍼 → SQLite 저장
+    frame_build    SQLite → 타입 프레임
+    interest_join  관심 목록 join (get_interest_data)
+    link_columns   KB/네이버 링크 컬럼 생성 (add_link_columns)
+    render_cold    캐시를 비운 상태에서 app.py 1회 실행 (Streamlit AppTest)
+    render_warm    캐시가 찬 상태에서 app.py 재실행
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+REGION_NAME = "춘천시"
+REGION_CODE = "51110"
+WATCH_COUNT = 20
+
+
+def timed(fn, repeat):
+    runs, result = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        runs.append((time.perf_counter() - t0) * 1000)
+    return runs, result
+
+
+def summarize(phase, size, deals, runs):
+    ordered = sorted(runs)
+    p95 = ordered[min(len(ordered) - 1, max(0, round(0.95 * len(ordered)) - 1))]
+    return {
+        "phase": phase, "size": size, "deals": deals,
+        "median_ms": round(statistics.median(runs), 3), "p95_ms": round(p95, 3),
+        "min_ms": round(ordered[0], 3), "max_ms": round(ordered[-1], 3),
+        "runs_ms": [round(r, 3) for r in runs],
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.run")
+    parser.add_argument("--sizes", default="1k,10k", help="쉼표 구분: 1k,10k,100k,500k 또는 숫자")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="스텁 요청당 지연 (초)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--skip-render", action="store_true", help="AppTest 렌더링 단계 생략")
+    parser.add_argument("--out", default="bench_report.json")
+    args = parser.parse_args(argv)
+
+    # 저장소/엔드포인트 설정은 모듈 import 시점에 읽히므로 스텁을 띄우고 환경변수를 잡은 뒤 import 한다
+    tmp = tempfile.TemporaryDirectory(prefix="realestate-bench-")
+    workdir = tmp.name
+    os.environ["REALESTATE_DB"] = os.path.join(workdir, "bench.db")
+    os.environ["REALESTATE_BACKGROUND_SYNC"] = "0"
+    sys.path.insert(0, str(ROOT))
+    from bench.stub_server import StubConfig, start_stub
+    config = StubConfig(latency=args.latency, error_rate=args.error_rate)
+    server, base_url = start_stub(config)
+    os.environ["MOLIT_API_BASE"] = f"{base_url}/1613000"
+    os.environ["NAVER_NEWS_URL"] = f"{base_url}/v1/search/news.json"
+
+    import pandas as pd
+    import fetcher
+    import molit
+    from bench.synth import parse_size, trade_page_xml
+    from frames import add_link_columns, get_interest_data, get_links
+    from store import connect, get_recent_months, load_trade_frame, save_partition
+    from sync import HISTORY_MONTHS
+    from watchlist import add_apt
+    config.months = HISTORY_MONTHS
+
+    months = get_recent_months(HISTORY_MONTHS)
+    jobs = [("apt", REGION_CODE, ym) for ym in months]
+    results = []
+
+    for label in args.sizes.split(","):
+        label = label.strip()
+        deals = parse_size(label)
+        config.deals = deals
+        record = lambda phase, runs: results.append(summarize(phase, label, deals, runs))
+        print(f"[{label}] {deals:,} deals", flush=True)
+
+        molit.fetch_trades("bench", jobs[:1])  # 스텁 페이지 캐시 예열
+
+        def fetch():
+            # 호스트 한도 / 회로 차단기는 프로세스 전역이라 반복마다 초기화 (--error-rate 로 줄어든 한도나 열린 회로를 재지 않도록)
+            fetcher.reset_state()
+            return molit.fetch_trades("bench", jobs)
+        runs, buffers = timed(fetch, args.repeat)
+        record("fetch", runs)
+        failed = [job for job, buf in buffers.items() if buf is None]
+        if failed: print(f"  ! {len(failed)}/{len(jobs)} months failed (error-rate {args.error_rate})", flush=True)
+
+        pages = [
+            trade_page_xml("apt", ym, config.deals_per_month, page, molit.PAGE_SIZE)
+            for ym in months for page in range(1, -(-config.deals_per_month // molit.PAGE_SIZE) + 1)
+        ]
+        runs, _ = timed(lambda: [molit.parse_trade_page("apt", p) for p in pages], args.repeat)
+        record("parse", runs)
+        del pages
+
+        def write():
+            with connect() as conn:
+                for job in jobs:
+                    if buffers[job] is not None: save_partition(conn, job, buffers[job])
+        runs, _ = timed(write, args.repeat)
+        record("store_write", runs)
+
+        runs, frame = timed(lambda: load_trade_frame("apt", REGION_CODE, months), args.repeat)
+        record("frame_build", runs)
+
+        top = frame.groupby(['동', '아파트명'], observed=True).size().nlargest(WATCH_COUNT).index
+        for dong, name in top: add_apt(REGION_NAME, dong, name)
+        runs, _ = timed(lambda: get_interest_data(frame, REGION_NAME), args.repeat)
+        record("interest_join", runs)
+
+        def links():
+            get_links.cache_clear()
+            return add_link_columns(frame.copy(), REGION_NAME)
+        runs, _ = timed(links, args.repeat)
+        record("link_columns", runs)
+
+        if not args.skip_render:
+            import streamlit as st
+            from streamlit.testing.v1 import AppTest
+
+            at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=600)
+            for key in ("public_api_key", "naver_client_id", "naver_client_secret"): at.secrets[key] = ""
+
+            def cold():
+                st.cache_data.clear()
+                st.cache_resource.clear()
+                at.run()
+            runs, _ = timed(cold, args.repeat)
+            record("render_cold", runs)
+            runs, _ = timed(at.run, args.repeat)
+            record("render_warm", runs)
+            if at.exception:
+                print(f"  ! app exceptions: {[e.value for e in at.exception]}", flush=True)
+
+        for r in results:
+            if r["size"] == label: print(f"  {r['phase']:<14} median {r['median_ms']:>10.1f} ms   p95 {r['p95_ms']:>10.1f} ms", flush=True)
+
+    server.shutdown()
+    tmp.cleanup()
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "stub_calls": config.calls,
+        },
+        "results": results,
+    }
+    Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"report → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
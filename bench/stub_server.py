@@ -0,0 +1,101 @@
+"""국토부 실거래가 / 네이버 뉴스 API 로컬 스텁 서버.
+
+    python -m bench.stub_server --deals 10k --latency 0.2 --error-rate 0.05
+
+앱이나 sync 를 스텁에 붙이려면
+    MOLIT_API_BASE=http://127.0.0.1:8765/1613000
+    NAVER_NEWS_URL=http://127.0.0.1:8765/v1/search/news.json
+"""
+import argparse
+import random
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from bench.synth import news_json, parse_size, trade_page_xml
+
+ENDPOINTS = {
+    "getRTMSDataSvcAptTradeDev": "apt",
+    "getRTMSDataSvcLandTrade": "land",
+}
+
+
+class StubConfig:
+    def __init__(self, deals=1_000, latency=0.0, error_rate=0.0, months=6, seed=0):
+        self.deals = deals              # (데이터셋, 지역) 당 조회 기간 전체 거래 수
+        self.latency = latency          # 요청당 지연 (초)
+        self.error_rate = error_rate    # 503 으로 응답할 확률
+        self.months = months            # 조회 기간 (sync.HISTORY_MONTHS 와 맞출 것)
+        self.rnd = random.Random(seed)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    @property
+    def deals_per_month(self):
+        return -(-self.deals // self.months)
+
+
+@lru_cache(maxsize=4096)
+def _trade_page(dataset, ym, total, page, rows):
+    return trade_page_xml(dataset, ym, total, page, rows)
+
+
+def make_handler(config):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+            with config.lock:
+                config.calls += 1
+                fail = config.rnd.random() < config.error_rate
+            if config.latency: time.sleep(config.latency)
+            if fail: return self._send(503, b"Service Unavailable", "text/plain")
+
+            endpoint = url.path.rstrip("/").rsplit("/", 1)[-1]
+            if endpoint in ENDPOINTS:
+                body = _trade_page(ENDPOINTS[endpoint], q.get("DEAL_YMD", "202601"), config.deals_per_month,
+                                   int(q.get("pageNo", 1)), int(q.get("numOfRows", 1000)))
+                return self._send(200, body, "application/xml; charset=utf-8")
+            if url.path.endswith("/v1/search/news.json"):
+                body = news_json(q.get("query", ""), int(q.get("start", 1)), int(q.get("display", 10)))
+                return self._send(200, body, "application/json; charset=utf-8")
+            self._send(404, b"Not Found", "text/plain")
+
+        def _send(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_stub(config, host="127.0.0.1", port=0):
+    """백그라운드 스레드에서 스텁을 띄우고 (서버, base_url) 을 돌려준다."""
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="bench-stub", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.stub_server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--deals", default="1k", help="(데이터셋, 지역) 당 거래 수: 1k/10k/100k/500k 또는 숫자")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+    config = StubConfig(parse_size(args.deals), args.latency, args.error_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(config))
+    print(f"stub listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
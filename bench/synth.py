@@ -0,0 +1,91 @@
+import copy
+import json
+import random
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+# -----------------------------------------------------------------------------
+# 벤치마크용 응답 픽스처
+#   fixtures/ 의 샘플 응답(실제 응답 스키마 그대로)을 틀로 삼아
+#   1k ~ 500k 건 규모의 국토부 XML / 네이버 뉴스 JSON 을 결정적으로 만든다.
+# -----------------------------------------------------------------------------
+FIXTURE_DIR = Path(__file__).parent / "fixtures"
+SAMPLES = {
+    "apt": FIXTURE_DIR / "apt_trade_sample.xml",
+    "land": FIXTURE_DIR / "land_trade_sample.xml",
+}
+NEWS_SAMPLE = FIXTURE_DIR / "naver_news_sample.json"
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "500k": 500_000}
+
+DONGS = ["퇴계동", "온의동", "석사동", "후평동", "동면", "신북읍", "우두동", "효자동", "근화동", "소양로", "약사명동", "칠전동", "사농동"]
+BRANDS = ["e편한세상", "힐스테이트", "더샵", "SK뷰", "푸르지오", "자이", "아이파크", "주공", "현진에버빌", "한신휴플러스"]
+JIMOK = ["대", "전", "답", "임야", "잡종지"]
+AREAS = [39.6, 49.9, 59.9, 74.9, 84.9, 101.9, 114.8, 134.7]
+
+
+def parse_size(label):
+    return SIZES[label] if label in SIZES else int(label)
+
+
+_templates = {}
+
+
+def sample_items(dataset):
+    if dataset not in _templates:
+        root = ET.parse(SAMPLES[dataset]).getroot()
+        _templates[dataset] = [{child.tag: child.text or "" for child in item} for item in root.iter("item")]
+    return _templates[dataset]
+
+
+def synth_item(dataset, template, ym, i):
+    rnd = random.Random(f"{dataset}:{ym}:{i}")
+    item = copy.copy(template)
+    dong = DONGS[rnd.randrange(len(DONGS))]
+    item.update({
+        "dealYear": ym[:4],
+        "dealMonth": str(int(ym[4:])),
+        "dealDay": str(rnd.randint(1, 28)),
+        "umdNm": dong,
+    })
+    if dataset == "apt":
+        area = AREAS[rnd.randrange(len(AREAS))]
+        complex_no = rnd.randrange(40)
+        item["aptNm"] = f"{dong[:2]}{BRANDS[complex_no % len(BRANDS)]}{complex_no // len(BRANDS) + 1}단지"
+        item["excluUseAr"] = f"{area + rnd.random() / 10:.4f}"
+        item["dealAmount"] = f"{int(area * rnd.uniform(250, 550)):,}"
+    else:
+        area = rnd.randint(100, 5000)
+        item["jimok"] = JIMOK[rnd.randrange(len(JIMOK))]
+        item["dealArea"] = str(area)
+        item["dealAmount"] = f"{int(area * rnd.uniform(5, 60)):,}"
+    return item
+
+
+def trade_page_xml(dataset, ym, total, page, rows, result_code="000"):
+    """(dataset, 년월) 의 전체 total 건 중 page 번째 페이지 응답 XML."""
+    templates = sample_items(dataset)
+    start = (page - 1) * rows
+    items = []
+    for i in range(start, min(total, start + rows)):
+        item = synth_item(dataset, templates[i % len(templates)], ym, i)
+        items.append("<item>" + "".join(f"<{k}>{escape(v)}</{k}>" for k, v in item.items()) + "</item>")
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?><response>'
+        f"<header><resultCode>{result_code}</resultCode><resultMsg>OK</resultMsg></header>"
+        f"<body><items>{''.join(items)}</items><numOfRows>{rows}</numOfRows>"
+        f"<pageNo>{page}</pageNo><totalCount>{total}</totalCount></body></response>"
+    ).encode("utf-8")
+
+
+def news_json(query, start, display, total=1000):
+    sample = json.loads(NEWS_SAMPLE.read_text(encoding="utf-8"))
+    templates = sample["items"]
+    items = []
+    for i in range(start, min(total + 1, start + display)):
+        item = dict(templates[i % len(templates)])
+        item["title"] = f"{query} {item['title']} #{i}"
+        item["originallink"] = f"{item['originallink']}&n={i}"
+        items.append(item)
+    sample.update({"total": total, "start": start, "display": len(items), "items": items})
+    return json.dumps(sample, ensure_ascii=False).encode("utf-8")
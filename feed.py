@@ -0,0 +1,124 @@
+import json
+import logging
+import os
+import time
+
+import pandas as pd
+
+from fetcher import describe_error, get_session
+from regions import REGIONS
+from store import connect, load_changes
+from watchlist import load_watchlist, watchlist_version
+
+log = logging.getLogger("feed")
+
+# -----------------------------------------------------------------------------
+# 관심 단지 변경 피드
+#   동기화가 남긴 deal_changes (새 거래 / 취소) 를 (LAWD_CD, 동, 아파트명) 색인으로
+#   관심 목록과 맞춘다. 비용은 변경 건수에만 비례한다.
+#   - 화면: 최근 NEW_BADGE_HOURS 안의 변경 → 관심 매물 탭 "새 거래" 배지
+#   - 알림: 마지막으로 보낸 id 이후 변경을 REALESTATE_ALERT_FILE (JSON 한 줄씩) 과
+#           REALESTATE_ALERT_WEBHOOK (POST JSON) 으로 보낸다
+# -----------------------------------------------------------------------------
+ALERT_FILE = os.environ.get("REALESTATE_ALERT_FILE", "")
+ALERT_WEBHOOK = os.environ.get("REALESTATE_ALERT_WEBHOOK", "")
+NEW_BADGE_HOURS = 24
+CHANGE_LABELS = {"new": "🆕 새 거래", "cancelled": "❌ 취소"}
+
+_index = {}
+
+
+def watch_index(db_file=None):
+    """{(LAWD_CD, 동, 아파트명): 지역 이름}. 관심 목록 version 이 바뀔 때만 다시 만든다."""
+    key = db_file or "default"
+    version = watchlist_version(db_file)
+    cached = _index.get(key)
+    if cached and cached[0] == version: return cached[1]
+    df = load_watchlist(db_file)
+    index = {
+        (REGIONS[region]["code"], dong, name): region
+        for region, dong, name in zip(df["지역"], df["동"], df["아파트명"]) if region in REGIONS
+    }
+    _index[key] = (version, index)
+    return index
+
+
+def match_watchlist(changes, db_file=None):
+    index = watch_index(db_file)
+    out = []
+    for c in changes:
+        region = index.get((c["lawd_cd"], c["dong"], c["name"]))
+        if region: out.append(dict(c, region=region))
+    return out
+
+
+def recent_watch_changes(region_name, hours=NEW_BADGE_HOURS, db_file=None):
+    """이 지역 관심 단지의 최근 변경 (계약일, 동, 아파트명, 면적, 국토부 실거래가, 변경, 감지시각)."""
+    since = time.time() - hours * 3600
+    changes = match_watchlist(load_changes(since_ts=since, lawd_cd=REGIONS[region_name]["code"], dataset="apt", db_file=db_file), db_file)
+    df = pd.DataFrame(changes, columns=["deal_date", "dong", "name", "area", "price", "change", "detected_at"])
+    return pd.DataFrame({
+        '계약일': pd.to_datetime(df['deal_date'], format='%Y.%m.%d', errors='coerce'),
+        '동': df['dong'].astype(str),
+        '아파트명': df['name'].astype(str),
+        '면적': df['area'].astype('float64'),
+        '국토부 실거래가': df['price'].astype('Int64'),
+        '변경': df['change'].map(CHANGE_LABELS),
+        '감지시각': pd.to_datetime(df['detected_at'], unit='s'),
+    })
+
+
+def mark_new_deals(df_interest, changes):
+    """관심 매물 프레임에 '새 거래' 배지 컬럼을 붙인다 (계약일, 동, 아파트명, 면적, 가격이 같은 새 거래)."""
+    df = df_interest.copy()
+    df['새 거래'] = ""
+    new = changes[changes['변경'] == CHANGE_LABELS["new"]]
+    if new.empty or df.empty: return df
+    cols = ['계약일', '동', '아파트명', '국토부 실거래가']
+    new_keys = pd.MultiIndex.from_frame(new[cols].assign(면적=new['면적'].round(2)))
+    keys = pd.MultiIndex.from_frame(df[cols].assign(면적=df['면적'].astype('float64').round(2)))
+    df.loc[keys.isin(new_keys), '새 거래'] = CHANGE_LABELS["new"]
+    return df
+
+
+def write_alert_file(alerts):
+    with open(ALERT_FILE, "a", encoding="utf-8") as f:
+        for a in alerts: f.write(json.dumps(a, ensure_ascii=False) + "\n")
+
+
+def post_alert_webhook(alerts):
+    res = get_session().post(ALERT_WEBHOOK, json={"alerts": alerts}, timeout=(3.05, 10))
+    res.raise_for_status()
+
+
+def alert_sinks():
+    """[(커서 이름, 보내기 함수)] — 설정된 알림 훅마다 위치를 따로 둔다."""
+    sinks = []
+    if ALERT_FILE: sinks.append(("alerts:file", write_alert_file))
+    if ALERT_WEBHOOK: sinks.append(("alerts:webhook", post_alert_webhook))
+    return sinks
+
+
+def dispatch_alerts(db_file=None):
+    """지난번 이후 관심 단지 변경을 알림 훅마다 보내고, 새로 찾은 관심 단지 변경 건수를 돌려준다.
+
+    건수 집계 ('alerts') 와 훅마다 위치를 따로 둔다. 처음 실행할 때는 기존 변경을 건너뛰고 위치만 잡는다.
+    훅 하나가 실패하면 그 훅의 위치만 그대로 두어 다음 동기화 때 그 훅에만 다시 보낸다 (다른 훅은 중복 없음).
+    """
+    count = 0
+    for cursor, send in [("alerts", None), *alert_sinks()]:
+        with connect(db_file) as conn:
+            row = conn.execute("SELECT last_id FROM feed_cursor WHERE name = ?", (cursor,)).fetchone()
+        last_id = row[0] if row else None
+        changes = load_changes(since_id=last_id or 0, dataset="apt", db_file=db_file)
+        if not changes and last_id is not None: continue
+        alerts = [] if last_id is None else match_watchlist(changes, db_file)
+        if alerts and send is not None:
+            try: send(alerts)
+            except Exception as e:
+                log.warning("관심 단지 알림 전송 실패 (%s): %s", cursor, describe_error(e))
+                continue
+        with connect(db_file) as conn:
+            conn.execute("INSERT OR REPLACE INTO feed_cursor VALUES (?, ?)", (cursor, changes[-1]["id"] if changes else 0))
+        if send is None: count = len(alerts)
+    return count
@@ -0,0 +1,311 @@
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+log = logging.getLogger("fetcher")
+
+# -----------------------------------------------------------------------------
+# 공통 HTTP 수집 엔진
+#   - keep-alive 세션 1개를 모든 요청이 공유
+#   - 스레드 풀에서 (데이터셋 × 지역 × 월) 요청을 동시에 실행
+#   - 호스트별 동시 요청 수를 응답 시간 / 오류에 맞춰 자동 조절 (AIMD)
+#   - 엔드포인트별 회로 차단기, API 키별 일일 호출 예산, 지터 지수 백오프 재시도
+# -----------------------------------------------------------------------------
+MAX_WORKERS = 16
+DEFAULT_HOST_LIMIT = 4
+HOST_LIMITS = {
+    "apis.data.go.kr": 8,
+    "openapi.naver.com": 4,
+}
+TIMEOUT = (3.05, 10)         # (연결, 읽기) 초
+TARGET_LATENCY = 2.0         # 이보다 느린 응답이 오면 동시 요청 수를 줄인다
+DECREASE_INTERVAL = 1.0      # 동시에 들어온 실패로 여러 번 줄이지 않도록
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+BREAKER_THRESHOLD = 5        # 연속 일시 오류가 이만큼 쌓이면 회로를 연다
+BREAKER_COOLDOWN = 60.0      # 열린 뒤 시험 요청 1개를 허용하기까지 (초)
+
+
+class TransientError(Exception):
+    """재시도하면 성공할 수 있는 오류 (429/5xx, API 일시 오류)."""
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """엔드포인트 회로가 열려 있어 요청을 보내지 않았다."""
+
+
+class QuotaExceededError(Exception):
+    """오늘 호출 예산을 다 썼다 (로컬 집계 또는 서버 응답)."""
+
+
+RETRYABLE = (TransientError, requests.ConnectionError, requests.Timeout)
+
+# 요청 URL 의 키 (data.go.kr 는 serviceKey 를 쿼리스트링으로 받는다)
+_SECRET_PARAM = re.compile(r"((?:serviceKey|client_id|client_secret)=)[^&\s'\"]+", re.IGNORECASE)
+
+
+def redact(text):
+    return _SECRET_PARAM.sub(r"\1***", str(text))
+
+
+def describe_error(e):
+    """저장 / 로그용 오류 설명: 예외 종류 + 키를 가린 메시지 (ConnectionError 등은 메시지에 전체 URL 이 들어 있다)."""
+    if e is None: return None
+    return f"{type(e).__name__}: {redact(e)}"
+
+
+class AdaptiveLimiter:
+    """호스트별 동시 요청 수. 빠르게 성공하면 조금씩 늘리고, 느리거나 실패하면 절반으로 줄인다."""
+    def __init__(self, max_limit):
+        self.max_limit = max_limit
+        self.limit = float(max_limit)
+        self.active = 0
+        self.last_decrease = 0.0
+        self.cond = threading.Condition()
+
+    def __enter__(self):
+        with self.cond:
+            while self.active >= int(self.limit): self.cond.wait()
+            self.active += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self.cond:
+            self.active -= 1
+            self.cond.notify()
+
+    def record(self, latency, ok):
+        with self.cond:
+            now = time.monotonic()
+            if not ok or latency > TARGET_LATENCY:
+                if now - self.last_decrease >= DECREASE_INTERVAL:
+                    self.limit = max(1.0, self.limit / 2)
+                    self.last_decrease = now
+            else:
+                self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+            self.cond.notify_all()
+
+
+class CircuitBreaker:
+    """closed → (연속 실패) → open → (cooldown) → half-open: 시험 요청 1개 → closed / open."""
+    def __init__(self, name):
+        self.name = name
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None: return "closed"
+        if time.monotonic() - self.opened_at < BREAKER_COOLDOWN: return "open"
+        return "half-open"
+
+    def before(self):
+        with self.lock:
+            if self.opened_at is None: return
+            if time.monotonic() - self.opened_at < BREAKER_COOLDOWN or self.trial:
+                metrics.incr("circuit_rejected_total", endpoint=self.name)
+                raise CircuitOpenError(f"{self.name} 회로 열림 (연속 {self.failures}회 실패)")
+            self.trial = True
+
+    def success(self):
+        with self.lock:
+            self.failures, self.opened_at, self.trial = 0, None, False
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial = False
+            if self.failures >= BREAKER_THRESHOLD:
+                if self.opened_at is None: log.warning("%s 회로 열림 (연속 %d회 실패)", self.name, self.failures)
+                self.opened_at = time.monotonic()
+
+    def settle(self):
+        # 영구 오류: 서버는 응답했으므로 실패로 세지 않고 시험 요청만 끝낸다
+        with self.lock: self.trial = False
+
+
+class CallBudget:
+    """API 키 × 엔드포인트의 오늘 호출 예산. used 는 저장소에서 읽은 값으로 시작한다."""
+    def __init__(self, limit, used=0):
+        self.limit = limit
+        self.used = used
+        self.spent = 0
+        self.exhausted = False
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            if self.exhausted or self.used >= self.limit:
+                raise QuotaExceededError(f"일일 호출 예산 소진 ({self.used}/{self.limit})")
+            self.used += 1
+            self.spent += 1
+
+    def exhaust(self):
+        with self.lock: self.exhausted = True
+
+
+_session = None
+_session_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+_limiters = {}
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=len(HOST_LIMITS) + 1, pool_maxsize=MAX_WORKERS)
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                _session = s
+    return _session
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="fetch")
+    return _executor
+
+
+def _host_limiter(host):
+    with _registry_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = AdaptiveLimiter(HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT))
+    return limiter
+
+
+def get_breaker(endpoint):
+    with _registry_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker(endpoint)
+    return breaker
+
+
+def reset_state():
+    """호스트 한도 / 회로 차단기를 처음 상태로 되돌린다 (벤치마크 반복 사이 등)."""
+    with _registry_lock:
+        _limiters.clear()
+        _breakers.clear()
+
+
+def circuit_states():
+    """{엔드포인트: (상태, 연속 실패 수)} — 진단 화면용."""
+    with _registry_lock: breakers = dict(_breakers)
+    return {name: (b.state, b.failures) for name, b in breakers.items()}
+
+
+def host_limits():
+    """{호스트: (현재 동시 요청 한도, 최대)} — 진단 화면용."""
+    with _registry_lock: limiters = dict(_limiters)
+    return {host: (int(l.limit), l.max_limit) for host, l in limiters.items()}
+
+
+def _retry_after(res):
+    try: return float(res.headers.get("Retry-After", ""))
+    except ValueError: return None
+
+
+def http_get(url, **kwargs):
+    """호스트별 동시성 제한을 지키며 공유 세션으로 GET 요청을 보낸다.
+
+    429/5xx 는 TransientError 로 바꿔 던진다. 응답 시간과 성공 여부는 호스트 한도 조절에 쓴다.
+    """
+    kwargs.setdefault("timeout", TIMEOUT)
+    host = urlsplit(url).hostname or ""
+    limiter = _host_limiter(host)
+    with limiter, metrics.span("http_request", host=host):
+        t0 = time.perf_counter()
+        try: res = get_session().get(url, **kwargs)
+        except Exception as e:
+            limiter.record(time.perf_counter() - t0, False)
+            metrics.incr("http_requests_total", host=host, status=type(e).__name__)
+            raise
+        limiter.record(time.perf_counter() - t0, res.status_code not in RETRY_STATUS)
+    metrics.incr("http_requests_total", host=host, status=res.status_code)
+    if res.status_code in RETRY_STATUS:
+        raise TransientError(f"HTTP {res.status_code} ({host})", _retry_after(res))
+    return res
+
+
+def backoff_delay(attempt, retry_after=None):
+    # full jitter: 0 ~ min(최대, 기본 × 2^attempt)
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    return max(delay, retry_after or 0)
+
+
+def call_api(endpoint, fn, budget=None, url=None):
+    """fn() 을 엔드포인트 회로 차단기 / 호출 예산 / 재시도 정책 아래에서 실행한다.
+
+    일시 오류는 지터 지수 백오프로 MAX_ATTEMPTS 까지 재시도하고, 회로가 열려 있거나
+    예산을 다 쓴 경우에는 요청 없이 바로 예외를 던진다. 재시도도 예산을 쓴다.
+    url 을 넘기면 일시 오류를 그 호스트의 동시 요청 한도에도 알린다 — HTTP 200 본문의
+    결과 코드로 온 오류 (data.go.kr 01/04/05 등) 는 http_get 이 성공으로 기록하기 때문.
+    """
+    breaker = get_breaker(endpoint)
+    limiter = _host_limiter(urlsplit(url).hostname or "") if url else None
+    for attempt in range(MAX_ATTEMPTS):
+        breaker.before()
+        try:
+            if budget is not None: budget.take()
+            result = fn()
+        except QuotaExceededError:
+            breaker.settle()
+            if budget is not None: budget.exhaust()
+            metrics.incr("quota_rejected_total", endpoint=endpoint)
+            raise
+        except RETRYABLE as e:
+            breaker.failure()
+            if limiter is not None: limiter.record(0.0, False)
+            if attempt == MAX_ATTEMPTS - 1: raise
+            metrics.incr("http_retries_total", endpoint=endpoint)
+            time.sleep(backoff_delay(attempt, getattr(e, "retry_after", None)))
+            continue
+        except Exception:
+            breaker.settle()
+            raise
+        breaker.success()
+        return result
+
+
+def fetch_all(jobs, handler, errors=None):
+    """jobs 의 각 항목에 handler(job) 을 동시에 실행하고 {job: 결과} 를 돌려준다.
+
+    handler 안에서 난 예외는 해당 job 의 결과를 None 으로 두고, errors 를 넘기면 {job: 예외} 로 남긴다.
+    """
+    jobs = list(jobs)
+    if not jobs: return {}
+    futures = {job: get_executor().submit(handler, job) for job in jobs}
+    results = {}
+    for job, fut in futures.items():
+        try: results[job] = fut.result()
+        except Exception as e:
+            results[job] = None
+            if errors is not None: errors[job] = e
+            log.debug("수집 실패 %s: %s", job, describe_error(e))
+    return results
@@ -0,0 +1,99 @@
+import urllib.parse
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from watchlist import region_keys
+
+# -----------------------------------------------------------------------------
+# 거래 프레임 가공 (관심 매물 join, 링크 컬럼, 추이 그래프 집계)
+#   Streamlit 없이 불러 쓸 수 있도록 app.py 밖에 둔다
+# -----------------------------------------------------------------------------
+@lru_cache(maxsize=65536)
+def get_links(region_name, dong, name, is_land=False):
+    city = region_name[:2]
+    q = f"{city} {dong} {name}"
+    enc = urllib.parse.quote(q)
+    if is_land: return {"kb": f"https://map.naver.com/p/search/{enc}", "naver": f"https://new.land.naver.com/search?sk={enc}"}
+    return {"kb": f"https://kbland.kr/search?q={enc}", "naver": f"https://new.land.naver.com/search?sk={enc}"}
+
+
+def add_link_columns(df, region_name, is_land=False):
+    # (동, 이름) 고유 조합마다 한 번만 링크를 만들고 factorize 코드로 펼침
+    if df.empty:
+        df['kb_link'] = pd.Series(dtype=object)
+        df['naver_link'] = pd.Series(dtype=object)
+        return df
+    codes, uniques = pd.factorize(pd.MultiIndex.from_arrays([df['동'].astype(str), df['아파트명'].astype(str)]))
+    links = [get_links(region_name, d, n, is_land) for d, n in uniques]
+    df['kb_link'] = np.array([l['kb'] for l in links], dtype=object)[codes]
+    df['naver_link'] = np.array([l['naver'] for l in links], dtype=object)[codes]
+    return df
+
+
+@metrics.timed()
+def get_interest_data(df_api, current_region):
+    if df_api.empty: return pd.DataFrame()
+    watch_keys = region_keys(current_region)
+    if watch_keys.empty: return pd.DataFrame()
+    keys = pd.MultiIndex.from_arrays([df_api['동'], df_api['아파트명']])
+    hits = df_api[keys.isin(watch_keys)].astype({'동': str, '아파트명': str})
+    # 관심 목록 기준 left join: 거래가 없는 관심 단지는 빈 행 1개로 남음
+    df_final = watch_keys.to_frame(index=False).merge(hits, on=['동', '아파트명'], how='left')
+    df_final['국토부 실거래가'] = df_final['국토부 실거래가'].astype('Int64')
+    # 거래 없는 관심 단지(계약일 없음)를 맨 위로
+    return df_final.sort_values(by=['계약일', '동'], ascending=[False, True], na_position='first')
+
+
+# -----------------------------------------------------------------------------
+# 추이 그래프: 면적 타입별 이동 중위값 + LTTB 다운샘플링
+#   거래가 몇 건이든 브라우저로 보내는 점 수는 POINT_BUDGET (점) + POINT_BUDGET (선) 이하
+# -----------------------------------------------------------------------------
+POINT_BUDGET = 1000
+ROLLING_WINDOW = "90D"
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: 모양을 유지하며 고른 threshold 개 점의 인덱스 (x 오름차순 가정)."""
+    n = len(x)
+    if threshold >= n: return np.arange(n)
+    if threshold < 3: return np.array([0, n - 1][:max(threshold, 0)], dtype=np.int64)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    idx = np.empty(threshold, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        idx[i + 1] = a
+    return idx
+
+
+def _downsample(df, value_col, budget):
+    if len(df) <= budget: return df
+    x = df['계약일'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    return df.iloc[lttb(x, df[value_col].to_numpy(), budget)]
+
+
+@metrics.timed()
+def trend_frames(df_apt, budget=POINT_BUDGET, window=ROLLING_WINDOW):
+    """(거래 점, 이동 중위값 선) 프레임. 면적 타입(㎡ 반올림)마다 거래 수에 비례해 점 예산을 나눈다."""
+    df = df_apt[['계약일', '면적', '국토부 실거래가']].dropna(subset=['계약일']).sort_values('계약일', kind='stable')
+    df = df.assign(면적타입=df['면적'].round().astype('int64').astype(str) + '㎡')
+    points, lines = [], []
+    total = max(len(df), 1)
+    for area_type, g in df.groupby('면적타입', sort=True):
+        share = max(3, budget * len(g) // total)
+        median = g.set_index('계약일')['국토부 실거래가'].rolling(window, min_periods=1).median()
+        line = pd.DataFrame({'계약일': median.index, '이동 중위가': median.to_numpy(), '면적타입': area_type})
+        points.append(_downsample(g, '국토부 실거래가', share))
+        lines.append(_downsample(line, '이동 중위가', share))
+    if not points: return df.iloc[:0], pd.DataFrame(columns=['계약일', '이동 중위가', '면적타입'])
+    return pd.concat(points, ignore_index=True), pd.concat(lines, ignore_index=True)
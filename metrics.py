@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+
+# -----------------------------------------------------------------------------
+# 경량 계측 (프로세스 전역)
+#   - span / timed : 구간 시간 (최근 WINDOW 개로 p50/p95 계산)
+#   - incr         : 카운터 (HTTP 호출, 캐시 hit/miss, 파싱 행 수 ...)
+#   - REALESTATE_METRICS_LOG  : JSON 한 줄 로그 파일 경로
+#   - REALESTATE_METRICS_FILE : Prometheus 텍스트 포맷 파일 경로 (rerun 마다 갱신)
+# -----------------------------------------------------------------------------
+WINDOW = 1000
+PREFIX = "realestate"
+METRICS_FILE = os.environ.get("REALESTATE_METRICS_FILE", "")
+METRICS_LOG = os.environ.get("REALESTATE_METRICS_LOG", "")
+
+log = logging.getLogger("realestate.metrics")
+if METRICS_LOG and not log.handlers:
+    _handler = logging.FileHandler(METRICS_LOG, encoding="utf-8")
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(_handler)
+    log.setLevel(logging.DEBUG)
+    log.propagate = False
+
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=WINDOW))
+_totals = defaultdict(lambda: [0, 0.0])
+_counters = defaultdict(float)
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def incr(name, n=1, **labels):
+    with _lock: _counters[_key(name, labels)] += n
+
+
+def observe(name, seconds, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _samples[key].append(seconds)
+        total = _totals[key]
+        total[0] += 1
+        total[1] += seconds
+    if log.isEnabledFor(logging.DEBUG):
+        log_event("span", span=name, ms=round(seconds * 1000, 3), **labels)
+
+
+@contextmanager
+def span(name, **labels):
+    t0 = time.perf_counter()
+    try: yield
+    finally: observe(name, time.perf_counter() - t0, **labels)
+
+
+def timed(name=None):
+    """함수 실행 시간을 span 으로 기록하는 데코레이터."""
+    def deco(fn):
+        span_name = name or fn.__name__
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name): return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def log_event(event, **fields):
+    if log.isEnabledFor(logging.INFO):
+        log.info(json.dumps({"ts": round(time.time(), 3), "event": event, **fields}, ensure_ascii=False, default=str))
+
+
+def percentile(values, q):
+    if not values: return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def snapshot():
+    with _lock:
+        samples = {k: list(v) for k, v in _samples.items()}
+        totals = {k: tuple(v) for k, v in _totals.items()}
+        counters = dict(_counters)
+    spans = [
+        {
+            "span": name, "labels": dict(labels), "count": totals[(name, labels)][0],
+            "p50_ms": percentile(vals, 0.5) * 1000, "p95_ms": percentile(vals, 0.95) * 1000,
+            "last_ms": vals[-1] * 1000 if vals else 0.0,
+        }
+        for (name, labels), vals in sorted(samples.items())
+    ]
+    counts = [{"counter": name, "labels": dict(labels), "value": v} for (name, labels), v in sorted(counters.items())]
+    return {"spans": spans, "counters": counts}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, **extra):
+    items = [*labels, *extra.items()]
+    if not items: return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def to_prometheus():
+    with _lock:
+        samples = {k: list(v) for k, v in _samples.items()}
+        totals = {k: tuple(v) for k, v in _totals.items()}
+        counters = dict(_counters)
+    lines = [f"# TYPE {PREFIX}_span_seconds summary"]
+    for (name, labels), vals in sorted(samples.items()):
+        base = (("span", name), *labels)
+        for q in (0.5, 0.95):
+            lines.append(f"{PREFIX}_span_seconds{_labels(base, quantile=q)} {percentile(vals, q):.6f}")
+        count, total = totals[(name, labels)]
+        lines.append(f"{PREFIX}_span_seconds_count{_labels(base)} {count}")
+        lines.append(f"{PREFIX}_span_seconds_sum{_labels(base)} {total:.6f}")
+    for name in sorted({n for n, _ in counters}):
+        lines.append(f"# TYPE {PREFIX}_{name} counter")
+        for (n, labels), v in sorted(counters.items()):
+            if n == name: lines.append(f"{PREFIX}_{name}{_labels(labels)} {v:g}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path=None):
+    path = path or METRICS_FILE
+    if not path: return
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f: f.write(to_prometheus())
+    os.replace(tmp, path)
@@ -0,0 +1,157 @@
+import io
+import math
+import os
+from array import array
+from datetime import date
+
+import metrics
+from fetcher import QuotaExceededError, TransientError, call_api, fetch_all, http_get
+
+# -----------------------------------------------------------------------------
+# 국토부 실거래가 데이터셋 정의
+#   새 데이터셋은 DATASETS 에 항목만 추가하면 같은 엔진으로 수집된다.
+#   MOLIT_API_BASE 로 엔드포인트를 바꿀 수 있다 (벤치마크용 로컬 스텁 등).
+# -----------------------------------------------------------------------------
+MOLIT_API_BASE = os.environ.get("MOLIT_API_BASE", "https://apis.data.go.kr/1613000").rstrip("/")
+DATASETS = {
+    "apt": {
+        "url": f"{MOLIT_API_BASE}/RTMSDataSvcAptTradeDev/getRTMSDataSvcAptTradeDev",
+        "endpoint": "RTMSDataSvcAptTradeDev",
+        "daily_limit": 10_000,
+        "name_field": "aptNm",
+        "area_field": "excluUseAr",
+    },
+    "land": {
+        "url": f"{MOLIT_API_BASE}/RTMSDataSvcLandTrade/getRTMSDataSvcLandTrade",
+        "endpoint": "RTMSDataSvcLandTrade",
+        "daily_limit": 10_000,
+        "name_field": "jimok",
+        "area_field": "dealArea",
+    },
+}
+PAGE_SIZE = 1000
+
+# 공공데이터포털 결과 코드 (resultCode / 게이트웨이 오류의 returnReasonCode)
+TRANSIENT_CODES = {1, 2, 4, 5}   # APPLICATION / DB / HTTP / SERVICE TIMEOUT
+QUOTA_CODES = {22}               # LIMITED_NUMBER_OF_SERVICE_REQUESTS_EXCEEDS
+NODATA_CODES = {3}               # NODATA_ERROR — 거래가 없는 달 (빈 페이지로 정상 처리)
+
+# -----------------------------------------------------------------------------
+# 컬럼 버퍼: 행(dict) 대신 컬럼별 타입 배열에 바로 쌓는다.
+# -----------------------------------------------------------------------------
+COLUMNS = ('deal_date', 'dong', 'name', 'area', 'price')
+
+
+def new_buffer():
+    return {'deal_date': [], 'dong': [], 'name': [], 'area': array('d'), 'price': array('q')}
+
+
+def extend_buffer(dst, src):
+    for col in COLUMNS: dst[col].extend(src[col])
+    return dst
+
+
+def buffer_rows(buf):
+    return zip(*(buf[col] for col in COLUMNS))
+
+
+def check_result_code(dataset, code):
+    n = int(code) if code and code.isdigit() else None
+    if n == 0 or n in NODATA_CODES: return
+    if n in QUOTA_CODES: raise QuotaExceededError(f"{dataset} 일일 호출 한도 초과 (code={code})")
+    if n in TRANSIENT_CODES: raise TransientError(f"{dataset} API 일시 오류 (code={code})")
+    raise ValueError(f"{dataset} API 오류 (resultCode={code})")
+
+
+@metrics.timed("parse_trade_page")
+def parse_trade_page(dataset, content):
+    """XML 한 페이지를 iterparse 로 훑으며 버퍼에 쌓고 (버퍼, totalCount) 를 돌려준다.
+
+    처리한 <item> 은 바로 비워서 페이지 전체 트리를 메모리에 들고 있지 않는다.
+    """
+    import xml.etree.ElementTree as ET   # 수집할 때만 필요 (대시보드 기동 경로에서는 불러오지 않음)
+
+    spec = DATASETS[dataset]
+    name_tag, area_tag = spec['name_field'], spec['area_field']
+    buf = new_buffer()
+    result_code, reason_code, total_count, items = None, None, 0, None
+    for event, elem in ET.iterparse(io.BytesIO(content), events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if tag == "items": items = elem
+            continue
+        if tag == "item":
+            try:
+                f = {child.tag: (child.text or '').strip() for child in elem}
+                if f.get('cdealType') == 'O':
+                    # 해제(취소)된 거래는 싣지 않는다 → 이미 저장된 거래라면 변경 피드에 '취소' 로 남는다
+                    metrics.incr("rows_cancelled_total", dataset=dataset)
+                    continue
+                price = int(f['dealAmount'].replace(',', ''))
+                area = float(f[area_tag])
+                # ★ 날짜 포맷: YYYY.MM.DD (빈 / 잘못된 날짜는 ValueError → 건너뜀)
+                d = date(int(f['dealYear']), int(f['dealMonth']), int(f['dealDay']))
+                date_str = f"{d.year}.{d.month:02d}.{d.day:02d}"
+                dong, name = f['umdNm'], f.get(name_tag, '')
+            except (KeyError, ValueError):
+                metrics.incr("rows_skipped_total", dataset=dataset)
+                continue
+            finally:
+                if items is not None: items.clear()
+                else: elem.clear()
+            buf['deal_date'].append(date_str)
+            buf['dong'].append(dong)
+            buf['name'].append(name)
+            buf['area'].append(area)
+            buf['price'].append(price)
+        elif tag == "resultCode":
+            result_code = (elem.text or '').strip()
+        elif tag == "returnReasonCode":
+            reason_code = (elem.text or '').strip()
+        elif tag == "totalCount":
+            total_count = int((elem.text or '0').strip() or 0)
+    check_result_code(dataset, result_code or reason_code)
+    metrics.incr("rows_parsed_total", len(buf['price']), dataset=dataset)
+    return buf, total_count
+
+
+def fetch_trade_page(api_key, job, page, budget=None):
+    dataset, region_code, ym = job
+    spec = DATASETS[dataset]
+    query_url = f"{spec['url']}?serviceKey={api_key}&LAWD_CD={region_code}&DEAL_YMD={ym}&numOfRows={PAGE_SIZE}&pageNo={page}"
+    def request():
+        return parse_trade_page(dataset, http_get(query_url, verify=False).content)
+    return call_api(spec['endpoint'], request, budget, url=spec['url'])
+
+
+def fetch_trades(api_key, jobs, budgets=None, errors=None):
+    """(데이터셋, 지역코드, 년월) job 들을 한꺼번에 요청하고 {job: 컬럼 버퍼} 를 돌려준다.
+
+    1페이지를 모두 받은 뒤 totalCount 로 남은 페이지를 한꺼번에 요청한다.
+    한 페이지라도 실패한 job 은 None 이므로 빈 달(거래 0건)과 구분되고, errors 를 넘기면
+    {job: 예외} 로 실패 원인을 남긴다. budgets 는 {데이터셋: CallBudget}.
+    """
+    jobs = list(jobs)
+    budgets = budgets or {}
+    errors = {} if errors is None else errors
+    first = fetch_all(jobs, lambda job: fetch_trade_page(api_key, job, 1, budgets.get(job[0])), errors)
+    page_counts = {job: math.ceil(res[1] / PAGE_SIZE) for job, res in first.items() if res is not None}
+    page_jobs = [(job, page) for job, n in page_counts.items() for page in range(2, n + 1)]
+    page_errors = {}
+    rest = fetch_all(page_jobs, lambda pj: fetch_trade_page(api_key, *pj, budgets.get(pj[0][0])), page_errors)
+    for (job, page), e in page_errors.items(): errors.setdefault(job, e)
+
+    out = {}
+    for job in jobs:
+        if first.get(job) is None:
+            out[job] = None
+            continue
+        buf = first[job][0]
+        for page in range(2, page_counts[job] + 1):
+            res = rest.get((job, page))
+            if res is None:
+                buf = None
+                break
+            extend_buffer(buf, res[0])
+        out[job] = buf
+    return out
@@ -0,0 +1,101 @@
+import re
+from collections import Counter
+
+# -----------------------------------------------------------------------------
+# 아파트명 퍼지 검색 인덱스
+#   이름을 별칭 정규화 → 한글 자모 분해 → 자모 3-gram 으로 바꿔 역색인을 만든다.
+#   "e편한세상" / "이편한세상", "SK뷰" / "에스케이뷰" 같은 표기 차이를 흡수한다.
+# -----------------------------------------------------------------------------
+CHO = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONG = " ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"
+
+# 브랜드 별칭 (긴 것부터 치환)
+ALIASES = {
+    "e편한세상": "이편한세상",
+    "e-편한세상": "이편한세상",
+    "i-park": "아이파크",
+    "ipark": "아이파크",
+    "the샵": "더샵",
+    "the#": "더샵",
+    "xi": "자이",
+    "s-클래스": "에스클래스",
+    "s클래스": "에스클래스",
+    "sk뷰": "에스케이뷰",
+    "sk view": "에스케이뷰",
+    "lh": "엘에이치",
+    "아파트": "",
+}
+# 남은 영문자는 한글 읽기로
+LETTERS = {
+    "a": "에이", "b": "비", "c": "씨", "d": "디", "e": "이", "f": "에프", "g": "지",
+    "h": "에이치", "i": "아이", "j": "제이", "k": "케이", "l": "엘", "m": "엠", "n": "엔",
+    "o": "오", "p": "피", "q": "큐", "r": "알", "s": "에스", "t": "티", "u": "유",
+    "v": "브이", "w": "더블유", "x": "엑스", "y": "와이", "z": "제트",
+}
+_ALIAS_RE = re.compile("|".join(re.escape(k) for k in sorted(ALIASES, key=len, reverse=True)))
+_DROP_RE = re.compile(r"[^0-9a-z가-힣]")
+GRAM = 3
+
+
+def normalize_name(name):
+    s = _ALIAS_RE.sub(lambda m: ALIASES[m.group(0)], str(name).lower())
+    s = _DROP_RE.sub("", s)
+    return "".join(LETTERS.get(ch, ch) for ch in s)
+
+
+def to_jamo(text):
+    out = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            out.append(CHO[code // 588])
+            out.append(JUNG[(code % 588) // 28])
+            if code % 28: out.append(JONG[code % 28])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def ngrams(name):
+    jamo = to_jamo(normalize_name(name))
+    if len(jamo) < GRAM: return Counter([jamo]) if jamo else Counter()
+    return Counter(jamo[i:i + GRAM] for i in range(len(jamo) - GRAM + 1))
+
+
+class NameIndex:
+    """이름 목록에 대한 자모 n-gram 역색인. search() 는 점수순 후보를 돌려준다."""
+
+    def __init__(self, names):
+        self.names = sorted({str(n) for n in names if str(n)})
+        self.norms = [normalize_name(n) for n in self.names]
+        self.sizes = []
+        self.postings = {}
+        for i, name in enumerate(self.names):
+            grams = ngrams(name)
+            self.sizes.append(sum(grams.values()))
+            for g, c in grams.items():
+                self.postings.setdefault(g, []).append((i, c))
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, query, n=5, cutoff=0.3):
+        q_grams = ngrams(query)
+        q_size = sum(q_grams.values())
+        if not q_size: return []
+        shared = Counter()
+        for g, qc in q_grams.items():
+            for i, c in self.postings.get(g, ()):
+                shared[i] += min(qc, c)
+        q_norm = normalize_name(query)
+        scored = []
+        for i, common in shared.items():
+            dice = 2 * common / (q_size + self.sizes[i])
+            contain = common / q_size
+            score = 0.5 * dice + 0.5 * contain
+            # 입력이 정식 명칭의 일부인 경우 ("한숲시티" → "e편한세상춘천한숲시티")
+            if q_norm and q_norm in self.norms[i]: score = max(score, 0.9 + 0.1 * dice)
+            if score >= cutoff: scored.append((score, self.names[i]))
+        scored.sort(key=lambda x: (-x[0], len(x[1]), x[1]))
+        return [(name, score) for score, name in scored[:n]]
@@ -0,0 +1,100 @@
+import os
+import re
+from datetime import datetime
+
+from fetcher import call_api, fetch_all, http_get
+from regions import REGIONS
+
+# -----------------------------------------------------------------------------
+# 네이버 뉴스 수집
+#   (지역, 분류) 마다 검색은 한 번만 (모든 지역 × 분류 × 페이지를 동시 요청),
+#   originallink 기준으로 중복을 없앤 뒤 언론사 domain_key 로 로컬에서 나눈다.
+# -----------------------------------------------------------------------------
+NEWS_URL = os.environ.get("NAVER_NEWS_URL", "https://openapi.naver.com/v1/search/news.json")
+NEWS_DISPLAY = 100
+NEWS_PAGES = 3
+NEWS_PER_PUBLISHER = 20
+NEWS_ENDPOINT = "naver_news"
+NEWS_DAILY_LIMIT = 25_000   # 검색 API 일일 호출 한도
+
+
+def clean_html(text):
+    return re.sub('<.+?>', '', text).replace('&quot;', '"').replace('&apos;', "'").replace('&amp;', '&')
+
+
+def search_keyword(region_name, category):
+    city = REGIONS.get(region_name, {}).get("news_keyword") or region_name[:2]
+    return f"{city} 부동산" if category == "부동산" else city
+
+
+def fetch_news_page(client_id, client_secret, query, start, budget=None):
+    headers = {"X-Naver-Client-Id": client_id, "X-Naver-Client-Secret": client_secret}
+    params = {"query": query, "display": NEWS_DISPLAY, "start": start, "sort": "date"}
+    def request():
+        res = http_get(NEWS_URL, headers=headers, params=params, timeout=(3.05, 5))
+        res.raise_for_status()
+        return res.json().get('items', [])
+    return call_api(NEWS_ENDPOINT, request, budget, url=NEWS_URL)
+
+
+def parse_news_item(item):
+    link = item['link']
+    originallink = item.get('originallink', '')
+    try:
+        # 뉴스 날짜 포맷: YYYY.MM.DD (오늘 비교용 YYYY-MM-DD 도 보관)
+        pub_date = datetime.strptime(item['pubDate'], "%a, %d %b %Y %H:%M:%S +0900")
+        date_str = pub_date.strftime("%Y.%m.%d")
+        compare_date = pub_date.strftime("%Y-%m-%d")
+    except ValueError:
+        date_str = item['pubDate']
+        compare_date = date_str
+    return {
+        'title': clean_html(item['title']),
+        'link': originallink if originallink else link,
+        'naver_link': link,
+        'date_str': date_str,
+        'compare_date': compare_date,
+    }
+
+
+def merge_pages(pages):
+    news, seen = [], set()
+    for items in pages:
+        for item in items or []:
+            try: n = parse_news_item(item)
+            except (KeyError, TypeError): continue
+            if n['link'] in seen: continue
+            seen.add(n['link'])
+            news.append(n)
+    return news
+
+
+def fetch_news_batch(client_id, client_secret, targets, pages=NEWS_PAGES, budget=None, errors=None):
+    """[(지역, 분류)] 검색을 한꺼번에 요청하고 {(지역, 분류): 기사 목록} 을 돌려준다.
+
+    첫 페이지부터 실패한 검색은 None 이므로 빈 결과와 구분되고, errors 를 넘기면 {(지역, 분류): 예외} 로 남긴다.
+    """
+    targets = list(targets)
+    starts = [1 + i * NEWS_DISPLAY for i in range(pages)]
+    jobs = [(target, start) for target in targets for start in starts]
+    page_errors = {}
+    results = fetch_all(jobs, lambda job: fetch_news_page(client_id, client_secret, search_keyword(*job[0]), job[1], budget), page_errors)
+    out = {}
+    for target in targets:
+        if results.get((target, 1)) is None:
+            out[target] = None
+            if errors is not None: errors[target] = page_errors.get((target, 1))
+            continue
+        out[target] = merge_pages(results.get((target, start)) for start in starts)
+    return out
+
+
+def partition_by_publisher(news, publishers, limit=NEWS_PER_PUBLISHER):
+    """{언론사 이름: 기사 목록}. domain_key 가 "ALL" 이면 전체 기사."""
+    buckets = {}
+    for pub in publishers:
+        key = pub['domain_key']
+        if key == "ALL": items = news
+        else: items = [n for n in news if key in n['link'] or key in n['naver_link']]
+        buckets[pub['name']] = [dict(n, source=pub['name']) for n in items[:limit]]
+    return buckets
@@ -0,0 +1,29 @@
+import os
+import tomllib
+
+# -----------------------------------------------------------------------------
+# ★ 지역 설정: regions.toml (REALESTATE_REGIONS 로 다른 파일 지정 가능)
+#   {지역 이름: {"code", "dongs", "publishers", "news_keyword"}} — 파일 순서대로 탭이 생긴다
+# -----------------------------------------------------------------------------
+REGIONS_FILE = os.environ.get("REALESTATE_REGIONS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "regions.toml"))
+
+
+def load_regions(path=REGIONS_FILE):
+    with open(path, "rb") as f: config = tomllib.load(f)
+    default_pubs = config.get("default_publishers", [{"name": "전체", "domain_key": "ALL"}])
+    regions = {}
+    for r in config["regions"]:
+        code = str(r["code"])
+        if len(code) != 5 or not code.isdigit(): raise ValueError(f"{path}: {r['name']} 의 code 는 5자리 LAWD_CD 여야 합니다 ({code})")
+        regions[r["name"]] = {
+            "code": code,
+            "dongs": sorted(r.get("dongs", [])),
+            "publishers": r.get("publishers", default_pubs),
+            "news_keyword": r.get("news_keyword", r["name"][:2]),
+        }
+    return regions
+
+
+REGIONS = load_regions()
+ALL_REGION_CODES = tuple(r["code"] for r in REGIONS.values())
+REGION_NAMES = {r["code"]: name for name, r in REGIONS.items()}
@@ -0,0 +1,220 @@
+import json
+import logging
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import metrics
+from store import DB_FILE, connect, load_cube, load_trade_frame, store_version, to_cube_frame, to_trade_frame
+
+log = logging.getLogger("snapshot")
+
+# -----------------------------------------------------------------------------
+# 기동용 스냅샷 (Arrow IPC 파일, 메모리 맵)
+#   동기화가 끝나면 거래 / 집계 큐브를 <DB 이름>.trades.arrow, <DB 이름>.cube.arrow 로 쓴다.
+#   (데이터셋, 지역) 별 record batch 1개 + 배치 색인 / 배치별 년월 목록을 스키마 메타데이터에 두어서
+#   화면은 필요한 지역 배치만 복사 없이 읽는다. 거래 배치는 이미 화면용 타입 / 정렬 상태.
+#   읽을 때는 달마다 고른다: 스냅샷 이후 로컬 DB 에 저장된 달과 스냅샷에 없는 달은 SQLite,
+#   나머지는 스냅샷 (새 컨테이너는 백필이 끝나기 전에도 네트워크 없이 바로 그린다).
+#   쓸 때는 그런 달이 있는 배치만 다시 만들고 나머지 배치는 그대로 옮기며,
+#   SNAPSHOT_INTERVAL 초에 한 번만 쓴다 (스냅샷이 없거나 python -m sync 1회 실행이면 바로).
+#   REALESTATE_SNAPSHOT 으로 파일 경로 앞부분을 바꿀 수 있다.
+# -----------------------------------------------------------------------------
+SNAPSHOT_PREFIX = os.environ.get("REALESTATE_SNAPSHOT", "")
+SNAPSHOT_INTERVAL = float(os.environ.get("REALESTATE_SNAPSHOT_INTERVAL", "3600"))   # 초
+
+# 계약일 단위는 to_trade_frame 과 같게 (pandas 3 은 us, 2 는 ns)
+DATE_TYPE = pa.from_numpy_dtype(pd.to_datetime(pd.Series(["2006.01.01"]), format="%Y.%m.%d").dtype)
+TRADE_SCHEMA = pa.schema([
+    ("ym", pa.int32()),                      # 파티션 년월 (deal_ymd) — 조회 기간 필터용
+    ("계약일", DATE_TYPE),
+    ("동", pa.string()),
+    ("아파트명", pa.string()),
+    ("면적", pa.float32()),
+    ("국토부 실거래가", pa.int64()),
+])
+CUBE_SCHEMA = pa.schema([
+    ("lawd_cd", pa.string()), ("deal_ymd", pa.string()), ("dong", pa.string()), ("name", pa.string()),
+    ("band", pa.string()), ("deals", pa.int64()), ("median_price", pa.float64()), ("median_m2", pa.float64()),
+])
+
+_open_files = {}
+
+
+def snapshot_path(kind, db_file=None):
+    prefix = SNAPSHOT_PREFIX or os.path.splitext(db_file or DB_FILE)[0]
+    return f"{prefix}.{kind}.arrow"
+
+
+def open_snapshot(kind, db_file=None):
+    """(reader, 메타데이터) 또는 None. 파일이 바뀌었을 때만 다시 메모리 맵으로 연다."""
+    path = snapshot_path(kind, db_file)
+    try: mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError: return None
+    cached = _open_files.get(path)
+    if cached and cached[0] == mtime: return cached[1]
+    reader = pa.ipc.open_file(pa.memory_map(path))
+    snap = reader, json.loads(reader.schema.metadata[b"snapshot"])
+    if "months" not in snap[1]: return None   # 년월 목록이 없는 예전 형식 — 새로 쓴다
+    _open_files[path] = (mtime, snap)
+    return snap
+
+
+def partition_versions(dataset, region_codes, months, db_file=None):
+    """{지역: {년월: 로컬 DB 에 마지막으로 내용이 저장된 시각}}."""
+    region_codes, months = list(region_codes), list(months)
+    code_marks = ",".join("?" * len(region_codes)) or "NULL"
+    month_marks = ",".join("?" * len(months)) or "NULL"
+    versions = {code: {} for code in region_codes}
+    with connect(db_file) as conn:
+        for code, ym, ts in conn.execute(
+                f"SELECT lawd_cd, deal_ymd, COALESCE(changed_at, synced_at) FROM partitions "
+                f"WHERE dataset=? AND lawd_cd IN ({code_marks}) AND deal_ymd IN ({month_marks})",
+                [dataset, *region_codes, *months]):
+            versions[code][ym] = ts
+    return versions
+
+
+def split_months(meta, key, versions, months):
+    """months 를 (스냅샷에서 읽을 달, SQLite 에서 읽을 달) 로 나눈다. versions: {년월: 로컬 DB 저장 시각}.
+
+    스냅샷 이후 DB 에 저장됐거나 스냅샷에 없는 달은 SQLite. 어느 쪽에도 없는 달(아직 받지 못한 달)은 빠진다.
+    """
+    have = set(meta["months"].get(key, ())) if meta else set()
+    keep = [ym for ym in months if ym in have and versions.get(ym, 0) <= meta["synced"]]
+    kept = set(keep)
+    return keep, [ym for ym in months if ym in versions and ym not in kept]
+
+
+def snapshot_months(dataset, region_code, db_file=None):
+    """스냅샷에 들어 있는 (dataset, 지역) 의 년월 집합. 스냅샷이 없으면 빈 집합."""
+    snap = open_snapshot("trades", db_file)
+    return set(snap[1]["months"].get(f"{dataset}/{region_code}", ())) if snap else set()
+
+
+def _batch_months(snap, key, column, months):
+    # 스냅샷 배치 중 months 의 행만
+    reader, meta = snap
+    batch = reader.get_batch(meta["index"][key])
+    return batch.filter(pc.is_in(batch[column], value_set=pa.array(months).cast(batch.schema.field(column).type)))
+
+
+def _write(path, schema, batches, meta):
+    tmp = f"{path}.tmp"
+    with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, schema.with_metadata({"snapshot": json.dumps(meta)})) as writer:
+        for batch in batches: writer.write_batch(batch)
+    os.replace(tmp, path)
+
+
+def _rebuild(snap, versions, column, read_db, sort_by=None):
+    """versions: {배치 키: {년월: 로컬 DB 저장 시각}} → (배치 목록, 색인, 배치별 년월, 다시 만든 배치 수).
+
+    SQLite 에서 읽을 달이 없는 배치는 이전 스냅샷 배치를 그대로 옮기고, 있으면 스냅샷의 나머지 달 + SQLite 의
+    그 달로 다시 만든다. 스냅샷에만 있는 달 (백필 중인 새 컨테이너) 도 버리지 않는다.
+    """
+    meta = snap[1] if snap else None
+    old = meta["months"] if meta else {}
+    batches, index, months, rebuilt = [], {}, {}, 0
+    for key in sorted(versions.keys() | old.keys()):
+        have = versions.get(key, {})
+        keep, fresh = split_months(meta, key, have, sorted(have.keys() | set(old.get(key, ()))))
+        if fresh:
+            parts = ([_batch_months(snap, key, column, keep)] if keep else []) + [read_db(key, fresh)]
+            batch = pa.concat_batches(parts)
+            if sort_by: batch = batch.sort_by(sort_by)
+            rebuilt += 1
+        else: batch = snap[0].get_batch(meta["index"][key])
+        index[key] = len(batches)
+        batches.append(batch.replace_schema_metadata(None))
+        months[key] = sorted(keep + fresh)
+    return batches, index, months, rebuilt
+
+
+@metrics.timed("snapshot_write")
+def write_snapshot(db_file=None, interval=SNAPSHOT_INTERVAL):
+    """로컬 DB 에 스냅샷 이후 저장된 달이 있으면 두 파일을 다시 쓰고 True 를 돌려준다.
+
+    바뀐 (데이터셋, 지역) 배치만 다시 만든다. 마지막으로 쓴 지 interval 초가 안 됐으면 건너뛴다.
+    """
+    count, synced = store_version(db_file)
+    if not count: return False
+    trades_snap, cube_snap = open_snapshot("trades", db_file), open_snapshot("cube", db_file)
+    if trades_snap and cube_snap:
+        if synced <= trades_snap[1]["synced"]: return False
+        if time.time() - os.stat(snapshot_path("trades", db_file)).st_mtime < interval: return False
+
+    with connect(db_file) as conn:
+        trade_versions, cube_versions = {}, {}
+        for dataset, lawd_cd, ym, ts in conn.execute(
+                "SELECT dataset, lawd_cd, deal_ymd, COALESCE(changed_at, synced_at) FROM partitions"):
+            trade_versions.setdefault(f"{dataset}/{lawd_cd}", {})[ym] = ts
+            if dataset == "apt": cube_versions.setdefault(lawd_cd, {})[ym] = ts
+
+        def read_trades(key, months):
+            # 기간 필터는 SQL 경로와 같게 파티션 년월로 (계약일이 NaT 인 행도 그대로 남는다)
+            df = pd.read_sql_query(
+                f"SELECT deal_ymd, deal_date, dong, name, area, price FROM trades "
+                f"WHERE dataset=? AND lawd_cd=? AND deal_ymd IN ({','.join('?' * len(months))})",
+                conn, params=[*key.split("/"), *months])
+            frame = to_trade_frame(df, keep=("deal_ymd",)).astype({'동': str, '아파트명': str})
+            frame.insert(0, "ym", frame.pop("deal_ymd").astype("int32"))
+            return pa.RecordBatch.from_pandas(frame, schema=TRADE_SCHEMA, preserve_index=False)
+
+        def read_cube(lawd_cd, months):
+            df = pd.read_sql_query(
+                f"SELECT * FROM trade_cube WHERE lawd_cd=? AND deal_ymd IN ({','.join('?' * len(months))})",
+                conn, params=[lawd_cd, *months])
+            return pa.RecordBatch.from_pandas(df, schema=CUBE_SCHEMA, preserve_index=False)
+
+        trades = _rebuild(trades_snap, trade_versions, "ym", read_trades, sort_by=[("계약일", "descending")])
+        cube = _rebuild(cube_snap, cube_versions, "deal_ymd", read_cube)
+
+    for kind, schema, (batches, index, months, _) in (("trades", TRADE_SCHEMA, trades), ("cube", CUBE_SCHEMA, cube)):
+        _write(snapshot_path(kind, db_file), schema, batches, {"synced": synced, "index": index, "months": months})
+    log.info("스냅샷 저장: 거래 배치 %d/%d개, 집계 배치 %d/%d개 다시 만듦",
+             trades[3], len(trades[0]), cube[3], len(cube[0]))
+    return True
+
+
+def snapshot_trade_frame(dataset, region_code, months, db_file=None):
+    """스냅샷 + 스냅샷 이후 저장된 달(SQLite) 로 load_trade_frame 과 같은 프레임을 만든다.
+
+    스냅샷에서 읽을 달이 없으면 None (전부 SQLite 에서 읽으면 된다).
+    """
+    snap = open_snapshot("trades", db_file)
+    if snap is None: return None
+    months = list(months)
+    keep, fresh = split_months(snap[1], f"{dataset}/{region_code}", partition_versions(dataset, [region_code], months, db_file)[region_code], months)
+    if not keep: return None
+    metrics.incr("snapshot_reads_total", kind="trades")
+    df = _batch_months(snap, f"{dataset}/{region_code}", "ym", keep).drop_columns(["ym"]).to_pandas(strings_to_categorical=True)
+    if not fresh: return df
+    df = pd.concat([df, load_trade_frame(dataset, region_code, fresh, db_file)], ignore_index=True)
+    df = df.astype({'동': 'category', '아파트명': 'category'})
+    return df.sort_values(by='계약일', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def snapshot_cube(region_codes, months, level="region", band="", dong=None, db_file=None):
+    """스냅샷 + 스냅샷 이후 저장된 달(SQLite) 로 load_cube 와 같은 프레임을 만든다. 스냅샷에서 읽을 달이 없으면 None."""
+    snap = open_snapshot("cube", db_file)
+    if snap is None: return None
+    months = list(months)
+    batches, fresh = [], {}   # fresh: {SQLite 에서 읽을 달: 지역 목록}
+    for code, versions in partition_versions("apt", region_codes, months, db_file).items():
+        keep, db_months = split_months(snap[1], code, versions, months)
+        if keep: batches.append(_batch_months(snap, code, "deal_ymd", keep))
+        if db_months: fresh.setdefault(tuple(db_months), []).append(code)
+    if not batches: return None
+    table = pa.Table.from_batches(batches)
+    no_dong, no_name = pc.equal(table["dong"], ""), pc.equal(table["name"], "")
+    mask = {"region": pc.and_(no_dong, no_name), "dong": pc.and_(pc.invert(no_dong), no_name), "apt": pc.invert(no_name)}[level]
+    mask = pc.and_(mask, pc.equal(table["band"], band))
+    if dong is not None: mask = pc.and_(mask, pc.equal(table["dong"], dong))
+    metrics.incr("snapshot_reads_total", kind="cube")
+    df = to_cube_frame(table.filter(mask).to_pandas())
+    if not fresh: return df
+    df = pd.concat([df, *(load_cube(codes, db_months, level, band, dong, db_file) for db_months, codes in fresh.items())], ignore_index=True)
+    return df.sort_values(['지역코드', '년월'], kind='stable').reset_index(drop=True)
@@ -0,0 +1,538 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from collections import Counter
+from contextlib import closing, contextmanager
+from datetime import datetime
+
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from fetcher import CallBudget, describe_error
+from molit import DATASETS, buffer_rows, fetch_trades
+
+# -----------------------------------------------------------------------------
+# 실거래 로컬 저장소 (SQLite)
+#   (dataset, LAWD_CD, DEAL_YMD) 단위 파티션으로 정규화된 행을 보관한다.
+#   - 이번 달 / 지난 달 : OPEN_REFRESH_HOURS 마다 다시 받음 (신고 기한 30일, 국토부는 하루 한 번 갱신)
+#                        — 스케줄러 주기(10분)와 따로 두어 일일 호출 예산을 아낀다
+#   - 그 이전 달       : 확정된 달로 보고 REVALIDATE_DAYS 마다 한 번만 재확인
+#                        (RECENT_MONTHS 보다 오래된 달은 ARCHIVE_REVALIDATE_DAYS 마다)
+#                        (재확인 기한은 파티션마다 최대 REVALIDATE_JITTER 만큼 늦춰서 같은 날 백필한 달이
+#                         한꺼번에 돌아오지 않게 하고, 실행당 MAX_REVALIDATE_PER_RUN 개, 오래된 것부터)
+#   - 한 번도 받지 않은 달(백필)은 최신 달부터, 실행당 / 일일 예산 일부만 써서 채운다
+#     (확정된 달 재확인과 백필이 같은 몫을 나눠 쓴다)
+#   - 받지 못한 달은 partition_failures 에 남겨 화면에서 누락/오래됨을 알린다
+#   - 다시 받은 파티션은 digest 가 같으면 건너뛰고, 다르면 거래 키 단위로 비교해
+#     새 거래 / 취소된 거래만 deal_changes 에 남긴다 (변경 피드)
+# -----------------------------------------------------------------------------
+DB_FILE = os.environ.get("REALESTATE_DB", "realestate.db")
+ARCHIVE_START = "200601"   # 국토부 실거래가 공개 시작 월
+REVALIDATE_DAYS = 7
+ARCHIVE_REVALIDATE_DAYS = 30
+RECENT_MONTHS = 12
+OPEN_MONTHS = 2
+MAX_BACKFILL_PER_RUN = 200     # 데이터셋별 (확정된 달 재확인 포함)
+MAX_REVALIDATE_PER_RUN = 100   # 데이터셋별
+REVALIDATE_JITTER = 0.25       # 재확인 기한을 파티션마다 0 ~ 25% 늦춘다
+BACKFILL_BUDGET_SHARE = 0.4    # 일일 호출 예산 중 백필 / 재확인에 쓸 수 있는 몫 (나머지는 진행 중인 달 갱신용)
+OPEN_REFRESH_HOURS = float(os.environ.get("REALESTATE_OPEN_REFRESH_HOURS", "6"))   # 진행 중인 달을 다시 받는 최소 간격
+OPEN_STALE_HOURS = 24   # 진행 중인 달이 이보다 오래 갱신되지 않으면 오래됨으로 본다
+CHANGE_RETENTION_DAYS = 90
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    dataset   TEXT NOT NULL,
+    lawd_cd   TEXT NOT NULL,
+    deal_ymd  TEXT NOT NULL,
+    deal_date TEXT NOT NULL,
+    dong      TEXT NOT NULL,
+    name      TEXT NOT NULL,
+    area      REAL,
+    price     INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_trades_partition ON trades(dataset, lawd_cd, deal_ymd);
+CREATE TABLE IF NOT EXISTS partitions (
+    dataset   TEXT NOT NULL,
+    lawd_cd   TEXT NOT NULL,
+    deal_ymd  TEXT NOT NULL,
+    synced_at  REAL NOT NULL,
+    row_count  INTEGER NOT NULL,
+    digest     TEXT,
+    changed_at REAL,
+    PRIMARY KEY (dataset, lawd_cd, deal_ymd)
+);
+CREATE TABLE IF NOT EXISTS deal_changes (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    detected_at REAL NOT NULL,
+    change      TEXT NOT NULL,
+    dataset     TEXT NOT NULL,
+    lawd_cd     TEXT NOT NULL,
+    deal_date   TEXT NOT NULL,
+    dong        TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    area        REAL,
+    price       INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_deal_changes_region ON deal_changes(lawd_cd, detected_at);
+CREATE TABLE IF NOT EXISTS trade_cube (
+    lawd_cd      TEXT NOT NULL,
+    deal_ymd     TEXT NOT NULL,
+    dong         TEXT NOT NULL,
+    name         TEXT NOT NULL,
+    band         TEXT NOT NULL,
+    deals        INTEGER NOT NULL,
+    median_price REAL NOT NULL,
+    median_m2    REAL NOT NULL,
+    PRIMARY KEY (lawd_cd, deal_ymd, dong, name, band)
+);
+CREATE TABLE IF NOT EXISTS cube_state (
+    lawd_cd  TEXT NOT NULL,
+    deal_ymd TEXT NOT NULL,
+    built_at REAL NOT NULL,
+    PRIMARY KEY (lawd_cd, deal_ymd)
+);
+CREATE TABLE IF NOT EXISTS partition_failures (
+    dataset   TEXT NOT NULL,
+    lawd_cd   TEXT NOT NULL,
+    deal_ymd  TEXT NOT NULL,
+    failed_at REAL NOT NULL,
+    error     TEXT,
+    PRIMARY KEY (dataset, lawd_cd, deal_ymd)
+);
+CREATE TABLE IF NOT EXISTS api_calls (
+    day         TEXT NOT NULL,
+    key_id      TEXT NOT NULL,
+    endpoint    TEXT NOT NULL,
+    calls       INTEGER NOT NULL,
+    daily_limit INTEGER NOT NULL,
+    PRIMARY KEY (day, key_id, endpoint)
+);
+CREATE TABLE IF NOT EXISTS news (
+    region     TEXT NOT NULL,
+    category   TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    items      TEXT NOT NULL,
+    PRIMARY KEY (region, category)
+);
+CREATE TABLE IF NOT EXISTS sync_runs (
+    kind        TEXT PRIMARY KEY,
+    finished_at REAL NOT NULL,
+    ok          INTEGER NOT NULL,
+    detail      TEXT
+);
+CREATE TABLE IF NOT EXISTS watchlist (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    region   TEXT NOT NULL,
+    dong     TEXT NOT NULL,
+    name     TEXT NOT NULL,
+    added_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_watchlist ON watchlist(region, dong, name);
+CREATE TABLE IF NOT EXISTS watchlist_meta (
+    id      INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS tr_watchlist_ins AFTER INSERT ON watchlist
+    BEGIN UPDATE watchlist_meta SET version = version + 1; END;
+CREATE TRIGGER IF NOT EXISTS tr_watchlist_del AFTER DELETE ON watchlist
+    BEGIN UPDATE watchlist_meta SET version = version + 1; END;
+CREATE TABLE IF NOT EXISTS feed_cursor (
+    name    TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL
+);
+"""
+
+
+_schema_ready = set()
+
+
+def _migrate(conn):
+    # 예전 DB 의 partitions 에 digest / changed_at 컬럼 추가
+    cols = {row[1] for row in conn.execute("PRAGMA table_info(partitions)")}
+    for col, decl in (("digest", "TEXT"), ("changed_at", "REAL")):
+        if col not in cols: conn.execute(f"ALTER TABLE partitions ADD COLUMN {col} {decl}")
+
+
+@contextmanager
+def connect(db_file=None):
+    db_file = db_file or DB_FILE
+    with closing(sqlite3.connect(db_file, timeout=30)) as conn:
+        if db_file not in _schema_ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            _migrate(conn)
+            _schema_ready.add(db_file)
+        with conn:
+            yield conn
+
+
+def get_recent_months(months=6, now=None):
+    now = now or datetime.now()
+    return [(now - relativedelta(months=i)).strftime("%Y%m") for i in range(months)]
+
+
+def archive_months(now=None, start=ARCHIVE_START):
+    """이번 달부터 start(YYYYMM) 까지, 최신 달부터."""
+    now = now or datetime.now()
+    first = datetime.strptime(start, "%Y%m")
+    span = (now.year - first.year) * 12 + now.month - first.month + 1
+    return get_recent_months(max(span, 1), now)
+
+
+def history_months(months, now=None):
+    """조회 기간 (개월 수, 0 = 국토부 전체 기간) → 년월 목록."""
+    return archive_months(now) if not months else get_recent_months(months, now)
+
+
+def open_months(now=None):
+    now = now or datetime.now()
+    return {(now - relativedelta(months=i)).strftime("%Y%m") for i in range(OPEN_MONTHS)}
+
+
+def _jitter(job):
+    # 파티션별로 고정된 0 ~ 1 값 (실행마다 같아야 하므로 hash() 대신 crc32)
+    return zlib.crc32("/".join(job).encode()) / 0xFFFFFFFF
+
+
+def stale_partitions(datasets, region_codes, months, now=None, db_file=None):
+    """(다시 받을 진행 중인 달, 재확인할 확정된 달 — 오래된 것부터, 한 번도 받지 않은 달 — 최신 달부터)."""
+    now_ts = time.time()
+    live = open_months(now)
+    recent = set(get_recent_months(RECENT_MONTHS, now))
+    with connect(db_file) as conn:
+        synced = {(ds, code, ym): ts for ds, code, ym, ts in conn.execute("SELECT dataset, lawd_cd, deal_ymd, synced_at FROM partitions")}
+
+    refresh, revalidate, backfill = [], [], []
+    for ds in datasets:
+        for code in region_codes:
+            for ym in months:
+                job = (ds, code, ym)
+                ts = synced.get(job)
+                if ts is None: backfill.append(job)
+                elif ym in live:
+                    if now_ts - ts > OPEN_REFRESH_HOURS * 3600: refresh.append(job)
+                elif now_ts - ts > (REVALIDATE_DAYS if ym in recent else ARCHIVE_REVALIDATE_DAYS) * 86400 * (1 + REVALIDATE_JITTER * _jitter(job)):
+                    revalidate.append(job)
+    revalidate.sort(key=synced.get)
+    backfill.sort(key=lambda job: job[2], reverse=True)
+    return refresh, revalidate, backfill
+
+
+def backfill_quota(budget):
+    """이번 실행에서 백필 + 확정된 달 재확인에 쓸 수 있는 job 수."""
+    return max(0, min(MAX_BACKFILL_PER_RUN, int(budget.limit * BACKFILL_BUDGET_SHARE) - budget.used))
+
+
+def deal_key(row):
+    """(계약일, 동, 이름, 면적, 가격) — 국토부 응답에 거래 ID 가 없으므로 내용으로 만든 키 (같은 키가 여러 건일 수 있음)."""
+    deal_date, dong, name, area, price = row
+    return deal_date, dong, name, round(float(area), 2), int(price)
+
+
+def partition_digest(keys):
+    return hashlib.blake2b(repr(sorted(keys.elements())).encode(), digest_size=16).hexdigest()
+
+
+def save_partition(conn, job, buf, feed_new=False, now=None):
+    """파티션을 새 버퍼로 바꾸고 (새 거래 수, 취소 거래 수) 를 돌려준다.
+
+    내용(digest)이 그대로면 행은 건드리지 않고 synced_at 만 갱신한다. 바뀌었으면 이 파티션의 기존 행과
+    거래 키 multiset 으로 비교해 차이만 deal_changes 에 남긴다. 처음 받는 달은 feed_new 이고 진행 중인
+    달일 때만 새 거래로 본다 (첫 적재 / 과거 달 백필은 피드에 남기지 않음).
+    """
+    ds, code, ym = job
+    ts = time.time()
+    where = "dataset=? AND lawd_cd=? AND deal_ymd=?"
+    keys = Counter(deal_key(row) for row in buffer_rows(buf))
+    digest = partition_digest(keys)
+    prev = conn.execute(f"SELECT digest FROM partitions WHERE {where}", job).fetchone()
+    conn.execute(f"DELETE FROM partition_failures WHERE {where}", job)
+    if prev is not None and prev[0] == digest:
+        conn.execute(f"UPDATE partitions SET synced_at=? WHERE {where}", (ts, *job))
+        return 0, 0
+
+    if prev is not None:
+        old = Counter(deal_key(row) for row in conn.execute(f"SELECT deal_date, dong, name, area, price FROM trades WHERE {where}", job))
+        added, removed = keys - old, old - keys
+    else:
+        added, removed = (keys if feed_new and ym in open_months(now) else Counter()), Counter()
+    conn.executemany(
+        "INSERT INTO deal_changes (detected_at, change, dataset, lawd_cd, deal_date, dong, name, area, price) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(ts, change, ds, code, *key) for change, diff in (("new", added), ("cancelled", removed)) for key in diff.elements()],
+    )
+    conn.execute(f"DELETE FROM trades WHERE {where}", job)
+    conn.executemany(
+        "INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        ((ds, code, ym, *row) for row in buffer_rows(buf)),
+    )
+    conn.execute("INSERT OR REPLACE INTO partitions (dataset, lawd_cd, deal_ymd, synced_at, row_count, digest, changed_at) "
+                 "VALUES (?, ?, ?, ?, ?, ?, ?)", (ds, code, ym, ts, len(buf['price']), digest, ts))
+    return sum(added.values()), sum(removed.values())
+
+
+def sync_trades(api_key, windows, region_codes, db_file=None):
+    """오래된 파티션만 API 에서 다시 받아 저장소에 반영하고 (갱신 수, {실패 job: 원인}, 남은 백필 수) 를 돌려준다.
+
+    windows 는 {데이터셋: 년월 목록}. 모든 지역 × 월 요청을 한꺼번에 보내고, 끝나면 집계 큐브를 갱신한다.
+    긴 기간은 백필 몫만큼 나눠 받으므로 여러 번 실행해야 다 채워진다.
+    """
+    if not api_key: return 0, {}, 0
+    datasets = tuple(windows)
+    budgets = open_budgets(api_key, {DATASETS[ds]['endpoint']: DATASETS[ds]['daily_limit'] for ds in datasets}, db_file)
+    jobs, pending = [], 0
+    for ds, months in windows.items():
+        refresh, revalidate, backfill = stale_partitions((ds,), region_codes, months, db_file=db_file)
+        quota = backfill_quota(budgets[DATASETS[ds]['endpoint']])
+        revalidate = revalidate[:min(quota, MAX_REVALIDATE_PER_RUN)]
+        quota -= len(revalidate)
+        jobs += refresh + revalidate + backfill[:quota]
+        pending += max(0, len(backfill) - quota)
+    if not jobs: return 0, {}, pending
+    errors = {}
+    try: results = fetch_trades(api_key, jobs, {ds: budgets[DATASETS[ds]['endpoint']] for ds in datasets}, errors)
+    finally: save_budgets(api_key, budgets, db_file)
+    updated, failed = 0, {}
+    now = time.time()
+    with connect(db_file) as conn:
+        # 이미 받아 둔 적이 있는 (데이터셋, 지역) 의 새 달만 변경 피드에 새 거래로 남긴다
+        known = set(conn.execute("SELECT DISTINCT dataset, lawd_cd FROM partitions"))
+        for job in jobs:
+            buf = results.get(job)
+            if buf is None:
+                # 실패한 달은 기존 데이터 유지, 원인만 기록
+                failed[job] = errors.get(job)
+                conn.execute("INSERT OR REPLACE INTO partition_failures VALUES (?, ?, ?, ?, ?)", (*job, now, describe_error(failed[job])))
+                continue
+            save_partition(conn, job, buf, feed_new=job[:2] in known)
+            updated += 1
+        conn.execute("DELETE FROM deal_changes WHERE detected_at < ?", (now - CHANGE_RETENTION_DAYS * 86400,))
+    refresh_cube(db_file)
+    return updated, failed, pending
+
+
+def partition_coverage(dataset, region_code, months, now=None, db_file=None):
+    """조회 기간 중 {'missing': 한 번도 받지 못한 달, 'stale': 마지막 갱신이 실패했거나 오래된 달}."""
+    months = list(months)
+    marks = ",".join("?" * len(months)) or "NULL"
+    live = open_months(now)
+    now_ts = time.time()
+    with connect(db_file) as conn:
+        synced = dict(conn.execute(
+            f"SELECT deal_ymd, synced_at FROM partitions WHERE dataset=? AND lawd_cd=? AND deal_ymd IN ({marks})",
+            [dataset, region_code, *months]))
+        failed = dict(conn.execute(
+            f"SELECT deal_ymd, failed_at FROM partition_failures WHERE dataset=? AND lawd_cd=? AND deal_ymd IN ({marks})",
+            [dataset, region_code, *months]))
+    missing, stale = [], []
+    for ym in months:
+        ts = synced.get(ym)
+        if ts is None: missing.append(ym)
+        elif failed.get(ym, 0) > ts or (ym in live and now_ts - ts > OPEN_STALE_HOURS * 3600): stale.append(ym)
+    return {'missing': missing, 'stale': stale}
+
+
+def store_version(db_file=None):
+    """저장소가 바뀔 때마다 달라지는 값. 프레임 캐시 키로 쓴다."""
+    with connect(db_file) as conn:
+        return tuple(conn.execute("SELECT COUNT(*), COALESCE(MAX(COALESCE(changed_at, synced_at)), 0) FROM partitions").fetchone())
+
+
+def to_trade_frame(df, keep=()):
+    """SQL 결과를 대시보드용 타입 프레임으로 바꾼다 (계약일 최신순). keep 의 컬럼은 그대로 붙여 둔다."""
+    frame = pd.DataFrame({
+        '계약일': pd.to_datetime(df['deal_date'], format='%Y.%m.%d', errors='coerce'),
+        '동': df['dong'].astype('category'),
+        '아파트명': df['name'].astype('category'),
+        '면적': df['area'].astype('float32'),
+        '국토부 실거래가': df['price'].astype('int64'),
+        **{col: df[col] for col in keep},
+    })
+    return frame.sort_values(by='계약일', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def load_trade_frame(dataset, region_code, months, db_file=None):
+    months = list(months)
+    marks = ",".join("?" * len(months)) or "NULL"
+    with connect(db_file) as conn:
+        df = pd.read_sql_query(
+            f"SELECT deal_date, dong, name, area, price FROM trades "
+            f"WHERE dataset=? AND lawd_cd=? AND deal_ymd IN ({marks})",
+            conn, params=[dataset, region_code, *months],
+        )
+    return to_trade_frame(df)
+
+
+def load_changes(since_id=0, since_ts=0, lawd_cd=None, dataset=None, db_file=None):
+    """deal_changes 행 (id 오름차순) 을 dict 목록으로."""
+    sql = "SELECT * FROM deal_changes WHERE id > ? AND detected_at >= ?"
+    params = [since_id, since_ts]
+    if lawd_cd is not None:
+        sql += " AND lawd_cd = ?"
+        params.append(lawd_cd)
+    if dataset is not None:
+        sql += " AND dataset = ?"
+        params.append(dataset)
+    with connect(db_file) as conn:
+        conn.row_factory = sqlite3.Row
+        return [dict(row) for row in conn.execute(sql + " ORDER BY id", params)]
+
+
+def changes_version(db_file=None):
+    with connect(db_file) as conn:
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM deal_changes").fetchone()[0]
+
+
+# -----------------------------------------------------------------------------
+# 아파트 월별 집계 큐브 (지역 × 동 × 단지 × 면적대 × 월)
+#   거래 수, 중위 가격, ㎡당 중위 가격. 중위값은 합칠 수 없으므로 상위 단계
+#   (지역 전체, 동 전체, 면적대 전체) 도 같은 표에 미리 계산해 두고 '' 로 표시한다.
+#   apt 파티션이 새로 저장된 (지역, 월) 만 다시 계산한다.
+# -----------------------------------------------------------------------------
+AREA_BANDS = [0, 40, 60, 85, 135, float("inf")]
+AREA_LABELS = ["40㎡ 이하", "40~60㎡", "60~85㎡", "85~135㎡", "135㎡ 초과"]
+PYEONG = 3.3058
+CUBE_GROUPS = [(), ("band",), ("dong",), ("dong", "band"), ("dong", "name"), ("dong", "name", "band")]
+CUBE_LEVELS = {
+    "region": "dong = '' AND name = ''",
+    "dong": "dong != '' AND name = ''",
+    "apt": "name != ''",
+}
+
+
+def update_cube(conn, lawd_cd, deal_ymd):
+    df = pd.read_sql_query(
+        "SELECT dong, name, area, price FROM trades WHERE dataset='apt' AND lawd_cd=? AND deal_ymd=? AND area > 0",
+        conn, params=[lawd_cd, deal_ymd])
+    conn.execute("DELETE FROM trade_cube WHERE lawd_cd=? AND deal_ymd=?", (lawd_cd, deal_ymd))
+    if not df.empty:
+        df['band'] = pd.cut(df['area'], AREA_BANDS, labels=AREA_LABELS).astype(str)
+        df['per_m2'] = df['price'] / df['area']
+        rows = []
+        for keys in CUBE_GROUPS:
+            g = df.groupby(list(keys), sort=False) if keys else df.assign(_all=0).groupby('_all')
+            agg = g.agg(deals=('price', 'size'), median_price=('price', 'median'), median_m2=('per_m2', 'median')).reset_index()
+            for col in ('dong', 'name', 'band'):
+                if col not in keys: agg[col] = ''
+            rows.extend(zip(agg['dong'], agg['name'], agg['band'], agg['deals'].astype(int), agg['median_price'], agg['median_m2']))
+        conn.executemany("INSERT INTO trade_cube VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         ((lawd_cd, deal_ymd, d, n, b, int(c), float(p), float(m)) for d, n, b, c, p, m in rows))
+    conn.execute("INSERT OR REPLACE INTO cube_state VALUES (?, ?, ?)", (lawd_cd, deal_ymd, time.time()))
+
+
+def refresh_cube(db_file=None):
+    """큐브보다 늦게 저장된 apt 파티션만 다시 집계하고, 다시 계산한 (지역, 월) 수를 돌려준다."""
+    with connect(db_file) as conn:
+        todo = conn.execute(
+            "SELECT p.lawd_cd, p.deal_ymd FROM partitions p LEFT JOIN cube_state c USING (lawd_cd, deal_ymd) "
+            "WHERE p.dataset = 'apt' AND (c.built_at IS NULL OR c.built_at < COALESCE(p.changed_at, p.synced_at))").fetchall()
+        for lawd_cd, deal_ymd in todo: update_cube(conn, lawd_cd, deal_ymd)
+    return len(todo)
+
+
+def cube_version(db_file=None):
+    with connect(db_file) as conn:
+        return tuple(conn.execute("SELECT COUNT(*), COALESCE(MAX(built_at), 0) FROM cube_state").fetchone())
+
+
+def load_cube(region_codes, months, level="region", band="", dong=None, db_file=None):
+    """큐브에서 (지역 목록 × 월) 행을 읽는다. level: region / dong / apt, band '' 은 면적 전체."""
+    region_codes, months = list(region_codes), list(months)
+    code_marks = ",".join("?" * len(region_codes)) or "NULL"
+    month_marks = ",".join("?" * len(months)) or "NULL"
+    sql = (f"SELECT lawd_cd, deal_ymd, dong, name, band, deals, median_price, median_m2 FROM trade_cube "
+           f"WHERE lawd_cd IN ({code_marks}) AND deal_ymd IN ({month_marks}) AND band = ? AND {CUBE_LEVELS[level]}")
+    params = [*region_codes, *months, band]
+    if dong is not None:
+        sql += " AND dong = ?"
+        params.append(dong)
+    with connect(db_file) as conn:
+        df = pd.read_sql_query(sql, conn, params=params)
+    return to_cube_frame(df)
+
+
+def to_cube_frame(df):
+    """trade_cube 행을 화면용 프레임으로 바꾼다 (지역코드, 년월 순)."""
+    return pd.DataFrame({
+        '지역코드': df['lawd_cd'],
+        '년월': pd.to_datetime(df['deal_ymd'], format='%Y%m'),
+        '동': df['dong'],
+        '아파트명': df['name'],
+        '면적대': df['band'],
+        '거래건수': df['deals'].astype('int64'),
+        '중위가격': df['median_price'],
+        '㎡당 중위가격': df['median_m2'],
+        '평당 중위가격': df['median_m2'] * PYEONG,
+    }).sort_values(['지역코드', '년월'], kind='stable').reset_index(drop=True)
+
+
+# -----------------------------------------------------------------------------
+# 뉴스 / 동기화 기록
+# -----------------------------------------------------------------------------
+def save_news(region_name, category, items, db_file=None):
+    with connect(db_file) as conn:
+        conn.execute("INSERT OR REPLACE INTO news VALUES (?, ?, ?, ?)",
+                     (region_name, category, time.time(), json.dumps(items, ensure_ascii=False)))
+
+
+def load_news(region_name, category, db_file=None):
+    with connect(db_file) as conn:
+        row = conn.execute("SELECT items FROM news WHERE region=? AND category=?", (region_name, category)).fetchone()
+    return json.loads(row[0]) if row else []
+
+
+def news_version(db_file=None):
+    with connect(db_file) as conn:
+        return conn.execute("SELECT COALESCE(MAX(fetched_at), 0) FROM news").fetchone()[0]
+
+
+def record_sync(kind, ok, detail="", db_file=None):
+    with connect(db_file) as conn:
+        conn.execute("INSERT OR REPLACE INTO sync_runs VALUES (?, ?, ?, ?)", (kind, time.time(), int(ok), detail))
+
+
+def last_syncs(db_file=None):
+    """{kind: (finished_at, ok, detail)}"""
+    with connect(db_file) as conn:
+        return {kind: (ts, bool(ok), detail) for kind, ts, ok, detail in conn.execute("SELECT * FROM sync_runs")}
+
+
+# -----------------------------------------------------------------------------
+# API 키별 일일 호출 예산 (키 원문 대신 해시로 보관)
+# -----------------------------------------------------------------------------
+def _key_id(api_key):
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+def _today():
+    return datetime.now().strftime("%Y%m%d")
+
+
+def open_budgets(api_key, limits, db_file=None):
+    """{엔드포인트: 한도} → 오늘 이미 쓴 호출 수로 시작하는 {엔드포인트: CallBudget}."""
+    with connect(db_file) as conn:
+        used = dict(conn.execute("SELECT endpoint, calls FROM api_calls WHERE day=? AND key_id=?", (_today(), _key_id(api_key))))
+    return {endpoint: CallBudget(limit, used.get(endpoint, 0)) for endpoint, limit in limits.items()}
+
+
+def save_budgets(api_key, budgets, db_file=None):
+    # 이번에 쓴 호출 수만 더한다 (CLI 와 앱 스레드가 동시에 돌아도 유실 없음)
+    # 서버가 한도 초과를 알려 오면 오늘은 한도만큼 쓴 것으로 둔다
+    day, key_id = _today(), _key_id(api_key)
+    with connect(db_file) as conn:
+        for endpoint, b in budgets.items():
+            conn.execute(
+                "INSERT INTO api_calls VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(day, key_id, endpoint) DO UPDATE SET calls = calls + excluded.calls, daily_limit = excluded.daily_limit",
+                (day, key_id, endpoint, b.spent, b.limit))
+            if b.exhausted:
+                conn.execute("UPDATE api_calls SET calls = MAX(calls, daily_limit) WHERE day=? AND key_id=? AND endpoint=?", (day, key_id, endpoint))
+
+
+def api_usage(db_file=None):
+    """오늘 [(key_id, endpoint, calls, daily_limit)]."""
+    with connect(db_file) as conn:
+        return conn.execute("SELECT key_id, endpoint, calls, daily_limit FROM api_calls WHERE day=? ORDER BY key_id, endpoint", (_today(),)).fetchall()
@@ -0,0 +1,130 @@
+"""실거래 / 뉴스 백그라운드 동기화.
+
+    python -m sync                # 1회 동기화
+    python -m sync --every 600    # 600초마다 반복
+
+키는 환경변수(PUBLIC_API_KEY, NAVER_CLIENT_ID, NAVER_CLIENT_SECRET) 또는
+.streamlit/secrets.toml 에서 읽는다. 대시보드는 같은 로컬 저장소만 읽는다.
+보관 기간은 REALESTATE_ARCHIVE_MONTHS (개월, 기본 0 = 2006.01 부터 전체) 이고,
+아직 받지 않은 과거 달은 실행마다 일부씩 채운다.
+실행이 끝나면 대시보드 기동용 Arrow 스냅샷 (<DB 이름>.trades.arrow / .cube.arrow) 을 다시 쓴다.
+"""
+import argparse
+import logging
+import os
+import threading
+import tomllib
+
+from feed import dispatch_alerts
+from fetcher import describe_error
+from molit import DATASETS
+from news import NEWS_DAILY_LIMIT, NEWS_ENDPOINT, fetch_news_batch
+from regions import ALL_REGION_CODES, REGIONS
+from snapshot import write_snapshot
+from store import history_months, open_budgets, record_sync, save_budgets, save_news, sync_trades
+
+log = logging.getLogger("sync")
+
+HISTORY_MONTHS = 6       # 대시보드 기본 조회 기간
+ARCHIVE_MONTHS = int(os.environ.get("REALESTATE_ARCHIVE_MONTHS", "0"))   # 보관 기간 (0 = 국토부 전체 기간)
+SYNC_INTERVAL = 600
+NEWS_CATEGORIES = ("부동산", "전체")
+SECRETS_FILE = os.path.join(".streamlit", "secrets.toml")
+
+
+def load_keys(secrets_file=SECRETS_FILE):
+    secrets = {}
+    if os.path.exists(secrets_file):
+        with open(secrets_file, "rb") as f: secrets = tomllib.load(f)
+    return {
+        name: os.environ.get(name.upper(), secrets.get(name, ""))
+        for name in ("public_api_key", "naver_client_id", "naver_client_secret")
+    }
+
+
+def sync_all_trades(api_key):
+    if not api_key: return
+    try:
+        window = history_months(ARCHIVE_MONTHS)
+        updated, failed, pending = sync_trades(api_key, {ds: window for ds in DATASETS}, ALL_REGION_CODES)
+        detail = f"{updated}개 월 갱신"
+        if pending: detail += f", 과거 {pending}개 월 백필 대기"
+        alerts = dispatch_alerts()
+        if alerts: detail += f", 관심 단지 변경 {alerts}건"
+        if failed:
+            causes = sorted({type(e).__name__ for e in failed.values() if e is not None})
+            detail += f", {len(failed)}개 월 실패 ({', '.join(causes)})"
+        record_sync("trades", not failed, detail)
+        log.info("실거래 동기화: %s", detail)
+    except Exception as e:
+        record_sync("trades", False, describe_error(e))
+        log.exception("실거래 동기화 실패")
+        return
+    # 다음 기동 / 다른 프로세스가 네트워크 없이 바로 그릴 수 있도록
+    try: write_snapshot()
+    except OSError as e: log.warning("스냅샷 저장 실패: %r", e)
+
+
+def sync_all_news(client_id, client_secret):
+    if not client_id or not client_secret: return
+    failed, errors = [], {}
+    targets = [(region_name, category) for region_name in REGIONS for category in NEWS_CATEGORIES]
+    budget = open_budgets(client_id, {NEWS_ENDPOINT: NEWS_DAILY_LIMIT})[NEWS_ENDPOINT]
+    try: results = fetch_news_batch(client_id, client_secret, targets, budget=budget, errors=errors)
+    finally: save_budgets(client_id, {NEWS_ENDPOINT: budget})
+    for (region_name, category), items in results.items():
+        if items is None:
+            failed.append(f"{region_name}/{category}")
+            log.warning("뉴스 동기화 실패 %s/%s: %s", region_name, category, describe_error(errors.get((region_name, category))))
+        else: save_news(region_name, category, items)
+    record_sync("news", not failed, ", ".join(failed))
+
+
+def run_once(keys):
+    sync_all_trades(keys.get("public_api_key"))
+    sync_all_news(keys.get("naver_client_id"), keys.get("naver_client_secret"))
+
+
+def run_forever(keys, interval=SYNC_INTERVAL, stop=None):
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        # 한 번 실패해도 스레드가 죽지 않고 다음 주기에 다시 시도
+        try: run_once(dict(keys))   # start_scheduler 가 도중에 키를 바꿀 수 있어 복사본으로 실행
+        except Exception: log.exception("동기화 실행 실패")
+        stop.wait(interval)
+
+
+_scheduler = None   # (공유 키 dict, 중지 Event)
+_scheduler_lock = threading.Lock()
+
+
+def start_scheduler(keys, interval=SYNC_INTERVAL):
+    """프로세스에 동기화 데몬 스레드를 1개만 띄우고 중지용 Event 를 돌려준다.
+
+    이미 돌고 있으면 스레드를 더 만들지 않고 비어 있지 않은 키만 바꾼다 (다음 주기부터 적용).
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is not None:
+            _scheduler[0].update({name: value for name, value in keys.items() if value})
+            return _scheduler[1]
+        shared, stop = dict(keys), threading.Event()
+        threading.Thread(target=run_forever, args=(shared, interval, stop), name="sync-scheduler", daemon=True).start()
+        _scheduler = shared, stop
+        return stop
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m sync", description="실거래 / 뉴스 로컬 저장소 동기화")
+    parser.add_argument("--every", type=int, default=0, help="N초마다 반복 (기본: 1회 실행)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    keys = load_keys()
+    if args.every: run_forever(keys, args.every)
+    else:
+        run_once(keys)
+        write_snapshot(interval=0)   # 1회 실행은 스냅샷 주기를 기다리지 않는다
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+
+import pandas as pd
+
+from store import connect
+
+# -----------------------------------------------------------------------------
+# 관심 아파트 목록 (SQLite, 저장소와 같은 DB 파일 / WAL)
+#   - 추가/삭제는 한 행 단위 트랜잭션 → 여러 사용자가 동시에 고쳐도 유실 없음
+#   - 트리거가 version 을 올리고, 읽기는 version 이 같으면 메모리 캐시를 그대로 씀
+#   - 처음 열 때 예전 my_apts.csv 가 있으면 가져온다
+# -----------------------------------------------------------------------------
+CSV_FILE = "my_apts.csv"
+DEFAULT_APTS = [
+    ("춘천시", "퇴계동", "e편한세상춘천한숲시티"),
+    ("원주시", "반곡동", "원주혁신도시중흥S-클래스프라디움"),
+]
+
+_cache = {}
+_import_lock = threading.Lock()
+_imported = set()
+
+
+def _connect(db_file=None):
+    # 표는 store.SCHEMA 에 있다. DB 마다 처음 한 번 watchlist_meta 행을 만들면서 예전 목록을 옮겨 온다
+    key = db_file or "default"
+    if key not in _imported:
+        with _import_lock, connect(db_file) as conn:
+            if conn.execute("INSERT OR IGNORE INTO watchlist_meta VALUES (1, 0)").rowcount:
+                _import_legacy(conn)
+            _imported.add(key)
+    return connect(db_file)
+
+
+def _import_legacy(conn):
+    # 예전 CSV 목록(없으면 기본값)을 한 번만 옮겨 온다
+    rows = DEFAULT_APTS
+    if os.path.exists(CSV_FILE):
+        try:
+            df = pd.read_csv(CSV_FILE)
+            if "지역" not in df.columns: df["지역"] = "춘천시"
+            rows = list(df[["지역", "동", "아파트명"]].astype(str).itertuples(index=False, name=None))
+        except: pass
+    now = time.time()
+    conn.executemany("INSERT OR IGNORE INTO watchlist (region, dong, name, added_at) VALUES (?, ?, ?, ?)",
+                     [(*r, now) for r in rows])
+
+
+def watchlist_version(db_file=None):
+    with _connect(db_file) as conn:
+        return conn.execute("SELECT version FROM watchlist_meta WHERE id = 1").fetchone()[0]
+
+
+def load_watchlist(db_file=None):
+    """id 를 인덱스로 하는 [지역, 동, 아파트명] 프레임 (읽기 전용, version 이 바뀔 때만 다시 읽음)."""
+    key = db_file or "default"
+    with _connect(db_file) as conn:
+        version = conn.execute("SELECT version FROM watchlist_meta WHERE id = 1").fetchone()[0]
+        cached = _cache.get(key)
+        if cached and cached[0] == version: return cached[1]
+        df = pd.read_sql_query("SELECT id, region AS 지역, dong AS 동, name AS 아파트명 FROM watchlist ORDER BY id",
+                               conn, index_col="id")
+    _cache[key] = (version, df)
+    return df
+
+
+def region_keys(region_name, db_file=None):
+    """(동, 아파트명) MultiIndex. 거래 프레임과 바로 join/isin 할 때 쓴다."""
+    df = load_watchlist(db_file)
+    region_df = df[df["지역"] == region_name]
+    return pd.MultiIndex.from_frame(region_df[["동", "아파트명"]])
+
+
+def add_apt(region_name, dong, name, db_file=None):
+    """추가되면 True, 이미 있으면 False."""
+    with _connect(db_file) as conn:
+        cur = conn.execute("INSERT OR IGNORE INTO watchlist (region, dong, name, added_at) VALUES (?, ?, ?, ?)",
+                           (region_name, dong, name, time.time()))
+        return cur.rowcount > 0
+
+
+def remove_apt(watch_id, db_file=None):
+    with _connect(db_file) as conn:
+        conn.execute("DELETE FROM watchlist WHERE id = ?", (int(watch_id),))